@@ -0,0 +1,209 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import pandas as pd
+import matplotlib as mpl
+from matplotlib.figure import Figure
+
+from drawBarplot import (
+    draw_barplot_means_sds,
+    draw_boxplot,
+    draw_panels,
+    draw_simple_barplot_means_sds,
+    draw_simple_boxplot,
+)
+from renderCache import RenderCache, figures_dir
+
+# a figure is a dict (see figures.json): "type", "data" (csv or parquet),
+# "markers" (csv like mock_markers.csv), "output" (.png, .svg or .pdf),
+# optional "figsize", "dpi", other keys are arguments of the draw function,
+# with "cols_with_digits" instead of "col_with_digits" - one panel
+# per column (see draw_panels, default figsize: panel_size per panel)
+plot_types: dict = {
+    "barplot": draw_barplot_means_sds,
+    "simple_barplot": draw_simple_barplot_means_sds,
+    "boxplot": draw_boxplot,
+    "simple_boxplot": draw_simple_boxplot,
+}
+figure_keys: [str] = ["type", "data", "markers", "output", "figsize", "dpi"]
+default_figure: dict = {"figsize": None, "dpi": None}
+single_figsize: [float] = [13, 8]
+
+# tables read by load_tables, shared by all the figures (and workers)
+tables: dict = {}
+
+
+def read_figures(path: str) -> [dict]:
+    with open(path, encoding="utf-8") as f:
+        figures: [dict] = json.load(f)
+    for figure in figures:
+        if figure["type"] not in plot_types:
+            raise ValueError(
+                "type should be one of: " + ", ".join(plot_types)
+            )
+    return [{**default_figure, **figure} for figure in figures]
+
+
+def read_table(path: str) -> pd.DataFrame:
+    if os.path.splitext(path)[1] == ".parquet":
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def read_markers(path: str) -> pd.DataFrame:
+    return pd.read_csv(path, index_col=0).fillna(value="")
+
+
+def load_tables(figures: [dict]) -> dict:
+    # every file is read once, no matter how many figures use it
+    loaded: dict = {}
+    for figure in figures:
+        if ("data", figure["data"]) not in loaded:
+            loaded[("data", figure["data"])] = read_table(figure["data"])
+        if ("markers", figure["markers"]) not in loaded:
+            loaded[("markers", figure["markers"])] = read_markers(
+                figure["markers"]
+            )
+    return loaded
+
+
+def init_worker(loaded: dict) -> None:
+    # worker processes draw without a display, tables come from the parent
+    # (with fork they are not even copied), the backend of the caller's
+    # process is not changed (figures are not managed by pyplot there)
+    mpl.use("Agg")
+    tables.update(loaded)
+
+
+def get_outputs(output: str, formats: [str] = None) -> [str]:
+    if formats is None:
+        return [output]
+    return [os.path.splitext(output)[0] + "." + fmt for fmt in formats]
+
+
+def render_figure(figure: dict, formats: [str] = None) -> [str]:
+    """
+    draws one figure (see read_figures) and saves it,
+    returns paths of the saved files
+    """
+    draw_function = plot_types[figure["type"]]
+    kwargs: dict = {
+        key: value for key, value in figure.items() if key not in figure_keys
+    }
+    kwargs["tab_with_data"] = tables[("data", figure["data"])]
+    kwargs["tab_with_signif_markers"] = tables[("markers", figure["markers"])]
+
+    if "cols_with_digits" in kwargs:
+        fig: mpl.figure.Figure = draw_panels(
+            draw_function, figsize=figure["figsize"], **kwargs
+        )
+    else:
+        fig: mpl.figure.Figure = Figure(
+            figsize=figure["figsize"] or single_figsize
+        )
+        draw_function(ax=fig.subplots(), **kwargs)
+
+    outputs: [str] = get_outputs(figure["output"], formats)
+    for output in outputs:
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        fig.savefig(output, dpi=figure["dpi"] or "figure")
+    return outputs
+
+
+def render_figures(
+    figures: [dict],
+    workers: int = None,
+    formats: [str] = None,
+    render_cache: RenderCache = None,
+) -> [str]:
+    """
+    draws all the figures (see read_figures), every table is read only
+    once, figures are drawn in workers processes (default: all the cores),
+    workers=1 - one after another in this process, with render_cache
+    (see renderCache) figures drawn before from the same data and
+    arguments are copied from the cache instead
+
+    Input:
+    ---
+    figures - list of figures (dicts, see read_figures)
+    workers - number of processes
+    formats - e.g. ["png", "svg"], every figure is saved in these formats
+              (default: the format of "output" of a figure)
+    render_cache - cache of the saved figures (None - off)
+
+    Output:
+    ---
+    paths of the saved files
+    """
+    loaded: dict = load_tables(figures)
+    keys: [str] = [None] * len(figures)
+    missing: [int] = []
+    for i, figure in enumerate(figures):
+        if render_cache is not None:
+            keys[i] = render_cache.get_key(
+                figure,
+                loaded[("data", figure["data"])],
+                loaded[("markers", figure["markers"])],
+            )
+            paths: [str] = get_outputs(figure["output"], formats)
+            if render_cache.get(keys[i], paths):
+                continue
+        missing.append(i)
+
+    if workers == 1 or len(missing) <= 1:
+        tables.update(loaded)
+        outputs: [[str]] = [
+            render_figure(figures[i], formats) for i in missing
+        ]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker, initargs=(loaded,)
+        ) as pool:
+            outputs: [[str]] = list(pool.map(
+                render_figure, [figures[i] for i in missing], repeat(formats)
+            ))
+    if render_cache is not None:
+        for i, paths in zip(missing, outputs):
+            render_cache.put(keys[i], paths)
+    return [
+        output
+        for figure in figures
+        for output in get_outputs(figure["output"], formats)
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="draws many figures in one go"
+    )
+    parser.add_argument("figures", help="json file with a list of figures")
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="number of processes (default: all the cores)",
+    )
+    parser.add_argument(
+        "--formats", nargs="+", default=None, choices=["png", "svg", "pdf"],
+        help="save every figure in these formats",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="draw all the figures again, skip .cache/figures",
+    )
+    parser.add_argument(
+        "--cache-mb", type=float, default=256,
+        help="size limit of the figures cached on disk",
+    )
+    args = parser.parse_args()
+
+    render_cache: RenderCache = None
+    if not args.no_cache:
+        render_cache = RenderCache(figures_dir, args.cache_mb * 2**20)
+    for output in render_figures(
+        read_figures(args.figures), args.workers, args.formats, render_cache
+    ):
+        print(output)
+    if render_cache is not None:
+        print(render_cache)
@@ -0,0 +1,148 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from groupStats import col_molecule
+
+# at most that many resampled values are held in memory at once
+max_cells: int = 2**22
+
+
+def bootstrap_means(
+    values_by_group: [np.ndarray], n_boot: int = 10_000, seed=0
+) -> np.ndarray:
+    """
+    means of n_boot resamples (with replacement) of every group,
+    all the groups are resampled at once: indexes of the resamples
+    are one matrix [resamples, values of all the groups]
+
+    Input:
+    ---
+    values_by_group - values of every group (NaNs are skipped)
+    n_boot - number of resamples
+    seed - seed of the random generator (the same seed, the same means)
+
+    Output:
+    ---
+    array [groups, n_boot], NaNs for groups without values
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    values_by_group = [np.asarray(values, dtype=float) for values in
+                       values_by_group]
+    values_by_group = [values[~np.isnan(values)] for values in
+                       values_by_group]
+    counts: np.ndarray = np.array([len(values) for values in values_by_group])
+    means: np.ndarray = np.full((len(counts), n_boot), np.nan)
+    if counts.sum() == 0:
+        return means
+
+    values: np.ndarray = np.concatenate(values_by_group)
+    starts: np.ndarray = np.cumsum(counts) - counts
+    # every column of a resample is drawn from the rows of its group
+    col_starts: np.ndarray = np.repeat(starts, counts)
+    col_counts: np.ndarray = np.repeat(counts, counts)
+    filled: np.ndarray = counts > 0
+    chunk: int = max(1, max_cells // len(values))
+    for start in range(0, n_boot, chunk):
+        stop: int = min(start + chunk, n_boot)
+        index: np.ndarray = col_starts + (
+            rng.random((stop - start, len(values))) * col_counts
+        ).astype(np.int64)
+        sums: np.ndarray = np.add.reduceat(
+            values[index], starts[filled], axis=1
+        )
+        means[filled, start:stop] = (sums / counts[filled]).T
+    return means
+
+
+def bootstrap_ci(
+    values_by_group: [np.ndarray],
+    level: float = 95,
+    n_boot: int = 10_000,
+    seed=0,
+) -> (np.ndarray, np.ndarray):
+    """
+    percentile bootstrap confidence intervals of means of groups
+    (see bootstrap_means), e.g. level=95 - from the 2.5th
+    to the 97.5th percentile of the resampled means
+
+    Output:
+    ---
+    lower and upper ends of the intervals (NaNs for groups without values)
+    """
+    means: np.ndarray = bootstrap_means(values_by_group, n_boot, seed)
+    low, high = np.percentile(
+        means, [50 - level / 2, 50 + level / 2], axis=1
+    )
+    return low, high
+
+
+def bootstrap_column(args: tuple) -> (np.ndarray, np.ndarray):
+    # one molecule (in a worker process)
+    return bootstrap_ci(*args)
+
+
+def bootstrap_cis(
+    tab_with_data: pd.DataFrame,
+    cols_digits: [str],
+    cols_groups: [str],
+    groups: pd.Index,
+    level: float = 95,
+    n_boot: int = 10_000,
+    seed: int = 0,
+    workers: int = 1,
+) -> pd.DataFrame:
+    """
+    bootstrap confidence intervals of means of every molecule in every
+    group (see bootstrap_ci), molecules may be resampled in parallel,
+    every molecule has its own seed (derived from seed), so the results
+    do not depend on workers
+
+    Input:
+    ---
+    tab_with_data - df with oryginal data, columns: [val1, val2, gr1, gr2]
+    cols_digits - names of the columns with digits (molecules)
+    cols_groups - names of the columns with groups, e.g. [big_gr, small_gr]
+    groups - groups (labels or tuples of labels), e.g.
+             pd.MultiIndex.from_product([order_big_group, order_small_group])
+    level - confidence level (percent)
+    n_boot - number of resamples
+    seed - seed of the random generator
+    workers - number of processes (1 - one molecule after another,
+              None - all the cores)
+
+    Output:
+    ---
+    df with columns: cols_groups + [molecule, low, high]
+    """
+    positions: dict = tab_with_data.groupby(
+        cols_groups if len(cols_groups) > 1 else cols_groups[0]
+    ).indices
+    seeds: [np.random.SeedSequence] = np.random.SeedSequence(seed).spawn(
+        len(cols_digits)
+    )
+    tasks: [tuple] = []
+    for col, col_seed in zip(cols_digits, seeds):
+        values: np.ndarray = tab_with_data[col].to_numpy()
+        tasks.append((
+            [values[positions.get(group, [])] for group in groups],
+            level,
+            n_boot,
+            col_seed,
+        ))
+    if workers == 1:
+        intervals: [tuple] = [bootstrap_column(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            intervals: [tuple] = list(pool.map(bootstrap_column, tasks))
+
+    labels: pd.DataFrame = groups.to_frame(index=False)
+    labels.columns = cols_groups
+    return pd.concat(
+        [
+            labels.assign(**{col_molecule: col, "low": low, "high": high})
+            for col, (low, high) in zip(cols_digits, intervals)
+        ],
+        ignore_index=True,
+    )
@@ -3,8 +3,195 @@ import numpy as np
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
+from matplotlib.figure import Figure
 import seaborn as sns
 
+from bootstrapCI import bootstrap_ci
+from groupStats import box_stats, is_summary, summary_to_stats
+from pointOverlay import draw_points_overlay
+
+
+def aggregate_groups(
+    tab_with_data: pd.DataFrame,
+    col_with_digits: str,
+    group_cols: [str],
+    groups: pd.Index,
+    errorbar="sd",
+    n_boot: int = 10_000,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    computes means and whiskers (sd, sem or bootstrap ci) of groups
+    in one pass
+
+    Input:
+    ---
+    tab_with_data - df with oryginal data, columns: [val1, val2, gr1, gr2]
+                    or its summary (see groupStats.summarise_file)
+    col_with_digits - name of the column with digits for which we draw barplot
+    group_cols - names of the columns with groups, e.g. [big_gr, small_gr]
+    groups - groups (labels or tuples of labels) in the order of bars
+    errorbar - "sd", "sem" (standard error of the mean), "ci" (95%
+               bootstrap confidence interval of the mean) or ("ci", level)
+    n_boot - number of bootstrap resamples (only for "ci")
+    seed - seed of the bootstrap (only for "ci")
+
+    Output:
+    ---
+    df with columns: [mean, low, high, err], indexed by groups (in their
+    order), whiskers go from low to high, err = high - mean
+    """
+    level: float = 95
+    if isinstance(errorbar, tuple):
+        errorbar, level = errorbar
+    if errorbar not in ["sd", "sem", "ci"]:
+        raise ValueError("errorbar should be 'sd', 'sem' or 'ci'")
+    if errorbar == "ci" and is_summary(tab_with_data):
+        raise ValueError("errorbar='ci' needs oryginal data, not a summary")
+
+    if is_summary(tab_with_data):
+        stats: pd.DataFrame = summary_to_stats(
+            tab_with_data, col_with_digits, group_cols
+        ).reindex(groups)
+    else:
+        stats: pd.DataFrame = (
+            tab_with_data.groupby(group_cols)[col_with_digits]
+            .agg(["count", "mean", "std"])
+            .reindex(groups)
+        )
+    if errorbar == "ci":
+        stats["low"], stats["high"] = bootstrap_ci(
+            split_groups(tab_with_data, col_with_digits, group_cols, groups),
+            level,
+            n_boot,
+            seed,
+        )
+    else:
+        half: pd.Series = stats["std"]
+        if errorbar == "sem":
+            half = stats["std"] / np.sqrt(stats["count"])
+        stats["low"] = stats["mean"] - half
+        stats["high"] = stats["mean"] + half
+    stats["err"] = stats["high"] - stats["mean"]
+    return stats[["mean", "low", "high", "err"]]
+
+
+def split_groups(
+    tab_with_data: pd.DataFrame,
+    col_with_digits: str,
+    group_cols: [str],
+    groups: pd.Index,
+) -> [np.ndarray]:
+    """
+    values of col_with_digits of every group (in the order of groups),
+    the table is grouped only once
+    """
+    positions: dict = tab_with_data.groupby(
+        group_cols if len(group_cols) > 1 else group_cols[0]
+    ).indices
+    values: np.ndarray = tab_with_data[col_with_digits].to_numpy()
+    return [values[positions.get(group, [])] for group in groups]
+
+
+def whiskers_y(stats: pd.DataFrame) -> np.ndarray:
+    """
+    y of all the whiskers drawn as one line (see draw_bars_with_caps),
+    segments are separated with NaNs: lower cap, whisker, upper cap
+    """
+    low: np.ndarray = stats["low"].to_numpy()
+    high: np.ndarray = stats["high"].to_numpy()
+    nans: np.ndarray = np.full(len(stats), np.nan)
+    return np.column_stack([
+        low, low, nans, low, high, nans, high, high, nans,
+    ]).ravel()
+
+
+def draw_bars_with_caps(
+    ax: mpl.axes.Axes,
+    x: [float],
+    stats: pd.DataFrame,
+    width: float,
+    colors: [(float)],
+    cap_width: float,
+) -> None:
+    """
+    draws bars (means) with whiskers (from low to high) and caps,
+    looks like sns.barplot(..., capsize=...), but nothing is recomputed
+
+    Input:
+    ---
+    ax - axes to draw on
+    x - centers of the bars
+    stats - df with columns: [mean, low, high], one row per bar
+            (see aggregate_groups)
+    width - width of a bar
+    colors - colors of the bars
+    cap_width - width of a whisker cap
+    """
+    x = np.asarray(x, dtype=float)
+    half_cap: np.ndarray = np.full(len(x), cap_width / 2)
+    nans: np.ndarray = np.full(len(x), np.nan)
+
+    ax.bar(
+        x=x,
+        height=stats["mean"].to_numpy(),
+        width=width,
+        color=[sns.desaturate(color, 0.75) for color in colors],
+        edgecolor="black",
+        linewidth=3,
+        zorder=3,
+    )
+    # all whiskers as one line, segments are separated with NaNs:
+    # lower cap, whisker, upper cap
+    ax.plot(
+        np.column_stack([
+            x - half_cap, x + half_cap, nans, x, x, nans,
+            x - half_cap, x + half_cap, nans,
+        ]).ravel(),
+        whiskers_y(stats),
+        color=".26",
+        linewidth=3,
+        zorder=2,
+    )
+
+
+def draw_boxes(
+    ax: mpl.axes.Axes,
+    x: [float],
+    stats: [dict],
+    width: float,
+    colors: [(float)],
+) -> None:
+    """
+    draws boxes from precomputed statistics (see groupStats.box_stats),
+    looks like sns.boxplot(..., linewidth=3)
+
+    Input:
+    ---
+    ax - axes to draw on
+    x - centers of the boxes
+    stats - statistics of the boxes, None - no box
+    width - width of a box
+    colors - colors of the boxes
+    """
+    drawn: [int] = [i for i, box in enumerate(stats) if box is not None]
+    line: dict = {"color": ".3", "linewidth": 3}
+    artists: dict = ax.bxp(
+        [stats[i] for i in drawn],
+        positions=[x[i] for i in drawn],
+        widths=width,
+        capwidths=width / 2,
+        patch_artist=True,
+        manage_ticks=False,
+        boxprops={"edgecolor": ".3", "linewidth": 3},
+        medianprops={**line, "solid_capstyle": "butt"},
+        whiskerprops={**line, "solid_capstyle": "butt"},
+        capprops=line,
+        flierprops={"markeredgecolor": ".3"},
+    )
+    for box, i in zip(artists["boxes"], drawn):
+        box.set_facecolor(sns.desaturate(colors[i], 0.75))
+
 
 def draw_barplot_means_sds(
     tab_with_data: pd.DataFrame,
@@ -22,13 +209,20 @@ def draw_barplot_means_sds(
     x_axis_title: str,
     draw_points: bool = False,
     use_sem: bool = False,
-) -> mpl.axes:
+    points_mode: str = "swarm",
+    max_points: int = 500,
+    errorbar=None,
+    n_boot: int = 10_000,
+    seed: int = 0,
+    ax: mpl.axes.Axes = None,
+) -> mpl.axes.Axes:
     """
     draws a barplot (with signif_markers) grouped by big_group and small_group
 
     Input:
     ---
     tab_with_data - df with oryginal data, columns: [val1, val2, gr1, gr2]
+                    or its summary (see groupStats.summarise_file)
     tab_with_signif_markers - col_names: [bg1_sg1, bg1_sg2, bg2_sg1, bg2_sg2],
                               row_names=[val1, val2]
     col_with_digits - name of the column with digits for which we draw barplot
@@ -43,44 +237,60 @@ def draw_barplot_means_sds(
     main_title - title of the graph
     y_axis_title - title on the y-axis (over y-axis, on the left)
     x_axis_title - title on the (under) x-axis
-    draw_points - should overlay points (sns.swarmplot) on bars
+    draw_points - should overlay points on bars
+                  (only with oryginal data, not with a summary)
     use_sem - should use standard error of the mean as whiskers instead of sd
+    points_mode - "swarm" (beeswarm) or "jitter" (deterministic jitter)
+    max_points - bars with more points get a density strip instead of points
+    errorbar - whiskers: "sd", "sem", "ci" (95% bootstrap confidence
+               interval of the mean, only with oryginal data)
+               or ("ci", level), default: "sem" if use_sem else "sd"
+    n_boot - number of bootstrap resamples (only for "ci")
+    seed - seed of the bootstrap (the same seed, the same whiskers)
+    ax - axes to draw on (default: the current axes, plt.gca())
 
     Output:
     ---
-    a graph (barplot) - mpl.axes object
+    a graph (barplot) - mpl.axes.Axes object
     bg - big_group (1, 2, 3...) - localization of bar groups (0, 1, 2, ..., n)
     sg - small_group (1, 2, 3...) - localization of bars within a group
     graph outlook
     bg1_sg1, bg1_sg2, bg1_sg3,...    bg2_sg1, bg2_sg2, bg2_sg3,...
     """
 
-    grouped_data: pd.DataFrame = tab_with_data[
-        [col_with_digits, col_big_group, col_small_group]
-    ].groupby([col_big_group, col_small_group])
-
-    means: pd.DataFrame = grouped_data.mean().reset_index()
-    stds: pd.DataFrame = grouped_data.std().reset_index()
+    if ax is None:
+        ax = plt.gca()
+
+    if draw_points and is_summary(tab_with_data):
+        raise ValueError("draw_points needs oryginal data, not a summary")
+    if errorbar is None:
+        errorbar = "sem" if use_sem else "sd"
+
+    stats: pd.DataFrame = aggregate_groups(
+        tab_with_data,
+        col_with_digits,
+        [col_big_group, col_small_group],
+        pd.MultiIndex.from_product([order_big_group, order_small_group]),
+        errorbar,
+        n_boot,
+        seed,
+    )
     extra_space_above_cap = 1.17  # should be > 1
 
-    if use_sem:
-        stds = grouped_data.sem().reset_index()
     if draw_points:
         extra_space_above_cap = 1.8
-    if draw_points and use_sem:
+    if draw_points and errorbar == "sem":
         extra_space_above_cap = 2.8
 
     maks_val: float = (
-        means[col_with_digits].max() + stds[col_with_digits].max()
+        stats["mean"].max() + stats["err"].max()
     ) * extra_space_above_cap
-    signif_makrers_heights: pd.DataFrame = means.copy()
-    signif_makrers_heights[col_with_digits] = (
-        signif_makrers_heights[col_with_digits] + stds[col_with_digits]
-    ) + (
-        maks_val * 0.1
-    )  # + (maks_val * 0.04) additonal space between maker and whisker cap
-
-    plt.grid(
+    # + (maks_val * 0.04) additonal space between maker and whisker cap
+    signif_makrers_heights: pd.Series = (
+        stats["mean"] + stats["err"] + maks_val * 0.1
+    )
+
+    ax.grid(
         visible=True,  # was: b=True
         linestyle="dashed",
         which="major",
@@ -91,40 +301,9 @@ def draw_barplot_means_sds(
         zorder=0,
     )
 
-    g: mpl.axes = sns.barplot(
-        x=tab_with_data.loc[:, col_big_group],
-        y=tab_with_data.loc[:, col_with_digits],
-        hue=tab_with_data.loc[:, col_small_group],
-        palette=colors_small_group,
-        order=order_big_group,
-        hue_order=order_small_group,
-        capsize=0.65,
-        err_kws={"linewidth": 3},
-        edgecolor="black",
-        linewidth=3,
-        errorbar="se" if use_sem else "sd",
-        zorder=2,
-    )
-
-    if draw_points:
-        sns.swarmplot(
-            x=tab_with_data.loc[:, col_big_group],
-            y=tab_with_data.loc[:, col_with_digits],
-            hue=tab_with_data.loc[:, col_small_group],
-            palette=colors_small_group,
-            order=order_big_group,
-            dodge=True,
-            hue_order=order_small_group,
-            size=15,
-            edgecolor="black",
-            linewidth=2,
-            alpha=0.5,
-            zorder=3,
-        )
-
     ticks_big: [int] = list(range(len(order_big_group)))
-    bar_width: float = g.patches[0].get_width()
     bars_per_big_group: int = len(order_small_group)
+    bar_width: float = 0.8 / bars_per_big_group  # as in seaborn
     half_way: float = bar_width * bars_per_big_group / 2
     ticks_small: [float] = [
         j
@@ -136,14 +315,36 @@ def draw_barplot_means_sds(
         )
     ]
 
-    # only upper whisker of sd is visible
-    for bar in g.patches:
-        bar.set_zorder(3)
+    # only upper whisker of sd is visible (bars cover the lower one)
+    draw_bars_with_caps(
+        ax=ax,
+        x=ticks_small,
+        stats=stats,
+        width=bar_width,
+        colors=colors_small_group * len(order_big_group),
+        cap_width=0.65 / bars_per_big_group,
+    )
 
-    axes = plt.gca()
-    axes.set_ylim([0, maks_val * 1.1])  # 1.1 additional space,
+    ax.set_xlim([-0.5, len(order_big_group) - 0.5])
+    ax.set_ylim([0, maks_val * 1.1])  # 1.1 additional space,
     # e.g so that legend would not overlap with signif_markers
 
+    if draw_points:
+        draw_points_overlay(
+            ax=ax,
+            values_by_group=split_groups(
+                tab_with_data,
+                col_with_digits,
+                [col_big_group, col_small_group],
+                stats.index,
+            ),
+            x=ticks_small,
+            width=bar_width,
+            colors=colors_small_group * len(order_big_group),
+            mode=points_mode,
+            max_points=max_points,
+        )
+
     handles1: [mpatches.Patch] = []
     for i in range(len(order_small_group)):
         handles1.append(
@@ -155,19 +356,16 @@ def draw_barplot_means_sds(
             )
         )
 
-    plt.legend(handles=handles1, loc="best")
+    ax.legend(handles=handles1, loc="best")
 
+    # stats (and heights) are in the order of bars, so markers are matched
+    # by position, the text is looked up by its bg_sg key
     counter: int = 0
     for big_group in order_big_group:
         for small_group in order_small_group:
-            plt.text(
+            ax.text(
                 x=ticks_small[counter],
-                y=signif_makrers_heights[
-                    np.logical_and(
-                        signif_makrers_heights[col_small_group] == small_group,
-                        signif_makrers_heights[col_big_group] == big_group,
-                    )
-                ][col_with_digits].iloc[0],
+                y=signif_makrers_heights.iloc[counter],
                 s=tab_with_signif_markers.loc[
                     col_with_digits, big_group + "_" + small_group
                 ],
@@ -177,10 +375,12 @@ def draw_barplot_means_sds(
             )
             counter += 1
 
-    plt.title(label=main_title)
-    plt.xlabel(xlabel=x_axis_title)
-    plt.ylabel(ylabel=y_axis_title)
-    plt.xticks(ticks=ticks_big, labels=labels_big_group)
+    ax.set_title(label=main_title)
+    ax.set_xlabel(xlabel=x_axis_title)
+    ax.set_ylabel(ylabel=y_axis_title)
+    ax.set_xticks(ticks=ticks_big, labels=labels_big_group)
+
+    return ax
 
 
 def draw_simple_barplot_means_sds(
@@ -196,13 +396,20 @@ def draw_simple_barplot_means_sds(
     x_axis_title: str,
     draw_points: bool = False,
     use_sem: bool = False,
-) -> mpl.axes:
+    points_mode: str = "swarm",
+    max_points: int = 500,
+    errorbar=None,
+    n_boot: int = 10_000,
+    seed: int = 0,
+    ax: mpl.axes.Axes = None,
+) -> mpl.axes.Axes:
     """
     draws a barplot (with signif_markers)
 
     Input:
     ---
     tab_with_data - df with oryginal data, columns: [val1, val2, gr1, gr2, ...]
+                    or its summary (see groupStats.summarise_file)
     tab_with_signif_markers - col_names: [gr1, gr2,...], row_names=[val1, val2]
     col_with_digits - name of the column with digits for which we draw barplot
     col_group - name of the column with group labels
@@ -212,39 +419,53 @@ def draw_simple_barplot_means_sds(
     main_title - title of the graph
     y_axis_title - title on the y-axis (over y-axis, on the left)
     x_axis_title - title on the (under) x-axis
-    draw_points - should overlay points (sns.swarmplot) on bars
+    draw_points - should overlay points on bars
+                  (only with oryginal data, not with a summary)
     use_sem - should use standard error of the mean as whiskers instead of sd
+    points_mode - "swarm" (beeswarm) or "jitter" (deterministic jitter)
+    max_points - bars with more points get a density strip instead of points
+    errorbar - whiskers: "sd", "sem", "ci" (95% bootstrap confidence
+               interval of the mean, only with oryginal data)
+               or ("ci", level), default: "sem" if use_sem else "sd"
+    n_boot - number of bootstrap resamples (only for "ci")
+    seed - seed of the bootstrap (the same seed, the same whiskers)
+    ax - axes to draw on (default: the current axes, plt.gca())
 
     Output:
     ---
-    a graph (barplot) - mpl.axes object
+    a graph (barplot) - mpl.axes.Axes object
     """
 
-    grouped_data: pd.DataFrame = tab_with_data[
-        [col_with_digits, col_group]].groupby([col_group])
+    if ax is None:
+        ax = plt.gca()
+
+    if draw_points and is_summary(tab_with_data):
+        raise ValueError("draw_points needs oryginal data, not a summary")
+    if errorbar is None:
+        errorbar = "sem" if use_sem else "sd"
 
-    means: pd.DataFrame = grouped_data.mean().reset_index()
-    stds: pd.DataFrame = grouped_data.std().reset_index()
+    stats: pd.DataFrame = aggregate_groups(
+        tab_with_data, col_with_digits, [col_group], pd.Index(order_group),
+        errorbar,
+        n_boot,
+        seed,
+    )
     extra_space_above_cap = 1.17  # should be > 1
 
-    if use_sem:
-        stds = grouped_data.sem().reset_index()
     if draw_points:
         extra_space_above_cap = 1.8
-    if draw_points and use_sem:
+    if draw_points and errorbar == "sem":
         extra_space_above_cap = 2.8
 
     maks_val: float = (
-        means[col_with_digits].max() + stds[col_with_digits].max()
+        stats["mean"].max() + stats["err"].max()
     ) * extra_space_above_cap
-    signif_makrers_heights: pd.DataFrame = means.copy()
-    signif_makrers_heights[col_with_digits] = (
-        signif_makrers_heights[col_with_digits] + stds[col_with_digits]
-    ) + (
-        maks_val * 0.1
-    )  # + (maks_val * 0.04) additonal space between maker and whisker cap
-
-    plt.grid(
+    # + (maks_val * 0.04) additonal space between maker and whisker cap
+    signif_makrers_heights: pd.Series = (
+        stats["mean"] + stats["err"] + maks_val * 0.1
+    )
+
+    ax.grid(
         visible=True,  # was: b=True
         linestyle="dashed",
         which="major",
@@ -255,49 +476,35 @@ def draw_simple_barplot_means_sds(
         zorder=0,
     )
 
-    g: mpl.axes = sns.barplot(
-        x=tab_with_data.loc[:, col_group],
-        y=tab_with_data.loc[:, col_with_digits],
-        hue=tab_with_data.loc[:, col_group],
-        palette=colors_group,
-        legend=False,
-        order=order_group,
-        hue_order=order_group,
-        capsize=0.65,
-        err_kws={"linewidth": 3},
-        edgecolor="black",
-        linewidth=3,
-        errorbar="se" if use_sem else "sd",
-        zorder=2,
-    )
-
-    if draw_points:
-        sns.swarmplot(
-            x=tab_with_data.loc[:, col_group],
-            y=tab_with_data.loc[:, col_with_digits],
-            hue=tab_with_data.loc[:, col_group],
-            palette=colors_group,
-            legend=False,
-            order=order_group,
-            dodge=False,
-            hue_order=order_group,
-            size=15,
-            edgecolor="black",
-            linewidth=2,
-            alpha=0.5,
-            zorder=3,
-        )
-
     ticks_big: [int] = list(range(len(order_group)))
 
-    # only upper whisker of sd is visible
-    for bar in g.patches:
-        bar.set_zorder(3)
+    # only upper whisker of sd is visible (bars cover the lower one)
+    draw_bars_with_caps(
+        ax=ax,
+        x=ticks_big,
+        stats=stats,
+        width=0.8,  # as in seaborn
+        colors=colors_group,
+        cap_width=0.65,
+    )
 
-    axes = plt.gca()
-    axes.set_ylim([0, maks_val * 1.1])  # 1.1 additional space,
+    ax.set_xlim([-0.5, len(order_group) - 0.5])
+    ax.set_ylim([0, maks_val * 1.1])  # 1.1 additional space,
     # e.g so that legend would not overlap with signif_markers
 
+    if draw_points:
+        draw_points_overlay(
+            ax=ax,
+            values_by_group=split_groups(
+                tab_with_data, col_with_digits, [col_group], stats.index
+            ),
+            x=ticks_big,
+            width=0.8,
+            colors=colors_group,
+            mode=points_mode,
+            max_points=max_points,
+        )
+
     handles1: [mpatches.Patch] = []
     for i in range(len(order_group)):
         handles1.append(
@@ -309,15 +516,13 @@ def draw_simple_barplot_means_sds(
             )
         )
 
-    plt.legend(handles=handles1, loc="best")
+    ax.legend(handles=handles1, loc="best")
 
     counter: int = 0
     for big_group in order_group:
-        plt.text(
+        ax.text(
             x=ticks_big[counter],
-            y=signif_makrers_heights.loc[
-                [gr == big_group for gr in signif_makrers_heights[col_group]],
-                col_with_digits].iloc[0],
+            y=signif_makrers_heights.iloc[counter],
             s=tab_with_signif_markers.loc[col_with_digits, big_group],
             horizontalalignment="center",
             fontdict={"fontsize": 30},
@@ -325,10 +530,12 @@ def draw_simple_barplot_means_sds(
         )
         counter += 1
 
-    plt.title(label=main_title)
-    plt.xlabel(xlabel=x_axis_title)
-    plt.ylabel(ylabel=y_axis_title)
-    plt.xticks(ticks=ticks_big, labels=labels_group)
+    ax.set_title(label=main_title)
+    ax.set_xlabel(xlabel=x_axis_title)
+    ax.set_ylabel(ylabel=y_axis_title)
+    ax.set_xticks(ticks=ticks_big, labels=labels_group)
+
+    return ax
 
 
 def draw_boxplot(
@@ -345,13 +552,16 @@ def draw_boxplot(
     main_title: str,
     y_axis_title: str,
     x_axis_title: str,
-) -> mpl.axes:
+    max_fliers: int = 100,
+    ax: mpl.axes.Axes = None,
+) -> mpl.axes.Axes:
     """
     draws a barplot (with signif_markers) grouped by big_group and small_group
 
     Input:
     ---
     tab_with_data - df with oryginal data, columns: [val1, val2, gr1, gr2]
+                    or its sample (see groupStats.sample_file)
     tab_with_signif_markers - col_names: [bg1_sg1, bg1_sg2, bg2_sg1, bg2_sg2],
                               row_names=[val1, val2]
     col_with_digits - name of the column with digits for which we draw barplot
@@ -366,32 +576,41 @@ def draw_boxplot(
     main_title - title of the graph
     y_axis_title - title on the y-axis (over y-axis, on the left)
     x_axis_title - title on the (under) x-axis
+    max_fliers - max number of outliers drawn per box (evenly spaced)
+    ax - axes to draw on (default: the current axes, plt.gca())
 
     Output:
     ---
-    a graph (barplot) - mpl.axes object
+    a graph (barplot) - mpl.axes.Axes object
     bg - big_group (1, 2, 3...) - localization of bar groups (0, 1, 2, ..., n)
     sg - small_group (1, 2, 3...) - localization of bars within a group
     graph outlook
     bg1_sg1, bg1_sg2, bg1_sg3,...    bg2_sg1, bg2_sg2, bg2_sg3,...
     """
 
-    grouped_data: pd.DataFrame = tab_with_data[
-        [col_with_digits, col_big_group, col_small_group]
-    ].groupby([col_big_group, col_small_group])
+    if ax is None:
+        ax = plt.gca()
 
-    maxes: pd.DataFrame = grouped_data.max().reset_index()
+    stats: [dict] = [
+        box_stats(values, max_fliers=max_fliers)
+        for values in split_groups(
+            tab_with_data,
+            col_with_digits,
+            [col_big_group, col_small_group],
+            pd.MultiIndex.from_product([order_big_group, order_small_group]),
+        )
+    ]
+    maxes: pd.Series = pd.Series(
+        [np.nan if box is None else box["max"] for box in stats]
+    )
 
     maks_val: float = (
-        maxes[col_with_digits].max() * 1.17
+        maxes.max() * 1.17
     )  # 1.17 adds additional free space above whisker cap
-    signif_makrers_heights: pd.DataFrame = maxes.copy()
     # + (maks_val * 0.04) additonal space between maker and whisker cap
-    signif_makrers_heights[col_with_digits] = (
-        signif_makrers_heights[col_with_digits]
-    ) + (maks_val * 0.1)
+    signif_makrers_heights: pd.Series = maxes + (maks_val * 0.1)
 
-    plt.grid(
+    ax.grid(
         visible=True,  # was: b=True
         linestyle="dashed",
         which="major",
@@ -402,19 +621,9 @@ def draw_boxplot(
         zorder=0,
     )
 
-    sns.boxplot(
-        x=tab_with_data.loc[:, col_big_group],
-        y=tab_with_data.loc[:, col_with_digits],
-        hue=tab_with_data.loc[:, col_small_group],
-        palette=colors_small_group,
-        order=order_big_group,
-        hue_order=order_small_group,
-        linewidth=3,
-    )
-
     ticks_big: [int] = list(range(len(order_big_group)))
-    box_width: float = 0.4  # default box width in seaborn
     boxes_per_big_group: int = len(order_small_group)
+    box_width: float = 0.8 / boxes_per_big_group  # as in seaborn
     half_way: float = box_width * boxes_per_big_group / 2
     ticks_small: [float] = [
         j
@@ -426,8 +635,16 @@ def draw_boxplot(
         )
     ]
 
-    axes = plt.gca()
-    axes.set_ylim([0, maks_val * 1.1])  # 1.1 additional space,
+    draw_boxes(
+        ax=ax,
+        x=ticks_small,
+        stats=stats,
+        width=box_width,
+        colors=colors_small_group * len(order_big_group),
+    )
+
+    ax.set_xlim([-0.5, len(order_big_group) - 0.5])
+    ax.set_ylim([0, maks_val * 1.1])  # 1.1 additional space,
     # e.g so that legend would not overlap with signif_markers
 
     handles1: [mpatches.Patch] = []
@@ -441,19 +658,14 @@ def draw_boxplot(
             )
         )
 
-    plt.legend(handles=handles1, loc="best")
+    ax.legend(handles=handles1, loc="best")
 
     counter: int = 0
     for big_group in order_big_group:
         for small_group in order_small_group:
-            plt.text(
+            ax.text(
                 x=ticks_small[counter],
-                y=signif_makrers_heights[
-                    np.logical_and(
-                        signif_makrers_heights[col_small_group] == small_group,
-                        signif_makrers_heights[col_big_group] == big_group,
-                    )
-                ][col_with_digits].iloc[0],
+                y=signif_makrers_heights.iloc[counter],
                 s=tab_with_signif_markers.loc[
                     col_with_digits, big_group + "_" + small_group
                 ],
@@ -463,10 +675,12 @@ def draw_boxplot(
             )
             counter += 1
 
-    plt.title(label=main_title)
-    plt.xlabel(xlabel=x_axis_title)
-    plt.ylabel(ylabel=y_axis_title)
-    plt.xticks(ticks=ticks_big, labels=labels_big_group)
+    ax.set_title(label=main_title)
+    ax.set_xlabel(xlabel=x_axis_title)
+    ax.set_ylabel(ylabel=y_axis_title)
+    ax.set_xticks(ticks=ticks_big, labels=labels_big_group)
+
+    return ax
 
 
 def draw_simple_boxplot(
@@ -480,13 +694,16 @@ def draw_simple_boxplot(
     main_title: str,
     y_axis_title: str,
     x_axis_title: str,
-) -> mpl.axes:
+    max_fliers: int = 100,
+    ax: mpl.axes.Axes = None,
+) -> mpl.axes.Axes:
     """
     draws a barplot (with signif_markers)
 
     Input:
     ---
     tab_with_data - df with oryginal data, columns: [val1, val2, gr1, gr2, ...]
+                    or its sample (see groupStats.sample_file)
     tab_with_signif_markers - col_names: [gr1, gr2,...], row_names=[val1, val2]
     col_with_digits - name of the column with digits for which we draw barplot
     col_group - name of the column with group labels
@@ -496,28 +713,34 @@ def draw_simple_boxplot(
     main_title - title of the graph
     y_axis_title - title on the y-axis (over y-axis, on the left)
     x_axis_title - title on the (under) x-axis
+    max_fliers - max number of outliers drawn per box (evenly spaced)
+    ax - axes to draw on (default: the current axes, plt.gca())
 
     Output:
     ---
-    a graph (barplot) - mpl.axes object
+    a graph (barplot) - mpl.axes.Axes object
     """
 
-    grouped_data: pd.DataFrame = tab_with_data[[col_with_digits, col_group]].groupby(
-        [col_group]
-    )
+    if ax is None:
+        ax = plt.gca()
 
-    maxes: pd.DataFrame = grouped_data.max().reset_index()
+    stats: [dict] = [
+        box_stats(values, max_fliers=max_fliers)
+        for values in split_groups(
+            tab_with_data, col_with_digits, [col_group], pd.Index(order_group)
+        )
+    ]
+    maxes: pd.Series = pd.Series(
+        [np.nan if box is None else box["max"] for box in stats]
+    )
 
     maks_val: float = (
-        maxes[col_with_digits].max() * 1.17
+        maxes.max() * 1.17
     )  # 1.17 adds additional free space above whisker cap
-    signif_makrers_heights: pd.DataFrame = maxes.copy()
     # + (maks_val * 0.04) additonal space between maker and whisker cap
-    signif_makrers_heights[col_with_digits] = (
-        signif_makrers_heights[col_with_digits]
-    ) + (maks_val * 0.1)
+    signif_makrers_heights: pd.Series = maxes + (maks_val * 0.1)
 
-    plt.grid(
+    ax.grid(
         visible=True,  # was: b=True
         linestyle="dashed",
         which="major",
@@ -528,21 +751,18 @@ def draw_simple_boxplot(
         zorder=0,
     )
 
-    sns.boxplot(
-        x=tab_with_data.loc[:, col_group],
-        y=tab_with_data.loc[:, col_with_digits],
-        hue=tab_with_data.loc[:, col_group],
-        palette=colors_group,
-        legend=False,
-        order=order_group,
-        hue_order=order_group,
-        linewidth=3,
-    )
-
     ticks_big: [int] = list(range(len(order_group)))
 
-    axes = plt.gca()
-    axes.set_ylim([0, maks_val * 1.1])  # 1.1 additional space,
+    draw_boxes(
+        ax=ax,
+        x=ticks_big,
+        stats=stats,
+        width=0.8,  # as in seaborn
+        colors=colors_group,
+    )
+
+    ax.set_xlim([-0.5, len(order_group) - 0.5])
+    ax.set_ylim([0, maks_val * 1.1])  # 1.1 additional space,
     # e.g so that legend would not overlap with signif_markers
 
     handles1: [mpatches.Patch] = []
@@ -556,16 +776,13 @@ def draw_simple_boxplot(
             )
         )
 
-    plt.legend(handles=handles1, loc="best")
+    ax.legend(handles=handles1, loc="best")
 
     counter: int = 0
     for big_group in order_group:
-        plt.text(
+        ax.text(
             x=ticks_big[counter],
-            y=signif_makrers_heights.loc[
-                [gr == big_group for gr in signif_makrers_heights[col_group]],
-                col_with_digits,
-            ].iloc[0],
+            y=signif_makrers_heights.iloc[counter],
             s=tab_with_signif_markers.loc[col_with_digits, big_group],
             horizontalalignment="center",
             fontdict={"fontsize": 26},
@@ -573,7 +790,59 @@ def draw_simple_boxplot(
         )
         counter += 1
 
-    plt.title(label=main_title)
-    plt.xlabel(xlabel=x_axis_title)
-    plt.ylabel(ylabel=y_axis_title)
-    plt.xticks(ticks=ticks_big, labels=labels_group)
+    ax.set_title(label=main_title)
+    ax.set_xlabel(xlabel=x_axis_title)
+    ax.set_ylabel(ylabel=y_axis_title)
+    ax.set_xticks(ticks=ticks_big, labels=labels_group)
+
+    return ax
+
+
+def draw_panels(
+    draw_function,
+    cols_with_digits: [str],
+    main_titles: [str] = None,
+    ncols: int = 4,
+    panel_size: (float, float) = (6, 4),
+    figsize: (float, float) = None,
+    **kwargs,
+) -> mpl.figure.Figure:
+    """
+    draws one panel (graph) per column with digits in a single figure,
+    the figure is not managed by pyplot (no global state, so it may be
+    drawn in many threads at once), save it with fig.savefig(path)
+
+    Input:
+    ---
+    draw_function - one of: draw_barplot_means_sds, draw_boxplot,
+                    draw_simple_barplot_means_sds, draw_simple_boxplot
+    cols_with_digits - names of the columns with digits (one panel each)
+    main_titles - titles of the panels (default: cols_with_digits)
+    ncols - number of panels in a row
+    panel_size - (width, height) of a panel in inches
+    figsize - (width, height) of the whole figure in inches
+              (default: panel_size times the number of panels)
+    kwargs - other arguments of draw_function (without col_with_digits,
+             main_title and ax)
+
+    Output:
+    ---
+    a figure with the panels - mpl.figure.Figure object
+    """
+    if main_titles is None:
+        main_titles = cols_with_digits
+    ncols = min(ncols, len(cols_with_digits))
+    nrows: int = -(-len(cols_with_digits) // ncols)
+
+    if figsize is None:
+        figsize = (panel_size[0] * ncols, panel_size[1] * nrows)
+    fig: mpl.figure.Figure = Figure(figsize=figsize, layout="constrained")
+    axs: np.ndarray = fig.subplots(nrows=nrows, ncols=ncols, squeeze=False)
+    for ax, col, title in zip(axs.flat, cols_with_digits, main_titles):
+        draw_function(
+            col_with_digits=col, main_title=title, ax=ax, **kwargs
+        )
+    for ax in axs.flat[len(cols_with_digits):]:
+        ax.set_visible(False)
+
+    return fig
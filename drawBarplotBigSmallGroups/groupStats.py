@@ -0,0 +1,243 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# summary of a table (one row per group and molecule):
+# group columns, "molecule", count, mean, m2 (sum of squared deviations
+# from the mean), min, max
+col_molecule: str = "molecule"
+summary_cols: [str] = ["count", "mean", "m2", "min", "max"]
+
+
+def is_summary(tab: pd.DataFrame) -> bool:
+    return set([col_molecule] + summary_cols).issubset(tab.columns)
+
+
+def summarise_chunk(
+    tab_with_data: pd.DataFrame, cols_groups: [str], cols_digits: [str]
+) -> pd.DataFrame:
+    """
+    count, mean, m2, min, max of every column of cols_digits in every group
+
+    Input:
+    ---
+    tab_with_data - df with oryginal data, columns: [val1, val2, gr1, gr2]
+    cols_groups - names of the columns with groups, e.g. [big_gr, small_gr]
+    cols_digits - names of the columns with digits (molecules)
+
+    Output:
+    ---
+    df indexed by [gr1, gr2, molecule], columns: summary_cols
+    """
+    stats: pd.DataFrame = (
+        tab_with_data.groupby(cols_groups)[cols_digits]
+        .agg(["count", "mean", "var", "min", "max"])
+        .stack(level=0, future_stack=True)
+    )
+    stats.index = stats.index.set_names(col_molecule, level=-1)
+    stats["m2"] = (stats["var"] * (stats["count"] - 1)).fillna(0)
+    stats = stats[stats["count"] > 0]
+    return stats[summary_cols]
+
+
+def merge_summaries(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    """
+    merges two summaries (see summarise_chunk) of different rows
+    of the same table (parallel version of Welford's algorithm)
+    """
+    index: pd.Index = a.index.union(b.index)
+    a = a.reindex(index)
+    b = b.reindex(index)
+    count_a: pd.Series = a["count"].fillna(0)
+    count_b: pd.Series = b["count"].fillna(0)
+    count: pd.Series = count_a + count_b
+    delta: pd.Series = b["mean"].fillna(0) - a["mean"].fillna(0)
+    merged: pd.DataFrame = pd.DataFrame(index=index)
+    merged["count"] = count
+    merged["mean"] = a["mean"].fillna(0) + delta * count_b / count
+    merged["m2"] = (
+        a["m2"].fillna(0) + b["m2"].fillna(0)
+        + delta**2 * count_a * count_b / count
+    )
+    merged["min"] = np.fmin(a["min"], b["min"])
+    merged["max"] = np.fmax(a["max"], b["max"])
+    return merged
+
+
+def read_chunks(path: str, columns: [str], chunksize: int):
+    # csv or parquet (needs pyarrow) file in pieces of chunksize rows
+    if os.path.splitext(path)[1] == ".parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(
+            batch_size=chunksize, columns=columns
+        ):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+
+def summarise_file(
+    path: str,
+    cols_groups: [str],
+    cols_digits: [str],
+    chunksize: int = 1_000_000,
+) -> pd.DataFrame:
+    """
+    summary of a table too big for memory, read in pieces
+
+    Input:
+    ---
+    path - csv or parquet file with data, columns: [val1, val2, gr1, gr2]
+    cols_groups - names of the columns with groups, e.g. [big_gr, small_gr]
+    cols_digits - names of the columns with digits (molecules)
+    chunksize - number of rows read at once
+
+    Output:
+    ---
+    summary (df) with columns: cols_groups + [molecule] + summary_cols,
+    it may be passed as tab_with_data to draw_barplot_means_sds,
+    draw_simple_barplot_means_sds and draw_groupedStackPlot
+    """
+    summary: pd.DataFrame = None
+    for chunk in read_chunks(path, cols_groups + cols_digits, chunksize):
+        stats: pd.DataFrame = summarise_chunk(chunk, cols_groups, cols_digits)
+        summary = stats if summary is None else merge_summaries(summary, stats)
+    if summary is None:
+        # no rows in the file
+        return pd.DataFrame(
+            columns=cols_groups + [col_molecule] + summary_cols
+        )
+    return summary.reset_index()
+
+
+def sample_file(
+    path: str,
+    cols_groups: [str],
+    cols_digits: [str],
+    k: int = 10_000,
+    chunksize: int = 1_000_000,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    random sample of rows of a table too big for memory, at most k rows
+    of every group (every row of a group has the same chance to be chosen),
+    e.g. for approximate boxplots of huge groups, quantiles of a sample of
+    k=10 000 rows are within ~1 percentile of the true ones
+
+    Input:
+    ---
+    path - csv or parquet file with data, columns: [val1, val2, gr1, gr2]
+    cols_groups - names of the columns with groups, e.g. [big_gr, small_gr]
+    cols_digits - names of the columns with digits (molecules)
+    k - max number of rows of a group
+    chunksize - number of rows read at once
+    seed - seed of the random generator (the same seed, the same sample)
+
+    Output:
+    ---
+    df with columns: cols_groups + cols_digits (like the oryginal data)
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    sample: pd.DataFrame = None
+    for chunk in read_chunks(path, cols_groups + cols_digits, chunksize):
+        # every row gets a random key, k rows with the smallest keys
+        # of every group are kept (also after merging with the sample)
+        chunk = chunk.assign(sample_key=rng.random(len(chunk)))
+        if sample is not None:
+            chunk = pd.concat([sample, chunk], ignore_index=True)
+        ranks: pd.Series = chunk.groupby(cols_groups)["sample_key"].rank(
+            method="first"
+        )
+        sample = chunk[ranks <= k]
+    if sample is None:
+        return pd.DataFrame(columns=cols_groups + cols_digits)
+    return sample.drop(columns="sample_key").reset_index(drop=True)
+
+
+def box_stats(
+    values: np.ndarray, whis: float = 1.5, max_fliers: int = 100
+) -> dict:
+    """
+    statistics of a box (as matplotlib.cbook.boxplot_stats) for ax.bxp,
+    quantiles are found by partitioning (no sorting of values),
+    at most max_fliers outliers are kept (evenly spaced, with the most
+    extreme ones), None for no values
+
+    Output:
+    ---
+    dict with keys: med, q1, q3, whislo, whishi, fliers, max
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+    q1, med, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    low: float = q1 - whis * (q3 - q1)
+    high: float = q3 + whis * (q3 - q1)
+    inside: np.ndarray = (values >= low) & (values <= high)
+    fliers: np.ndarray = np.sort(values[~inside])
+    if len(fliers) > max_fliers:
+        fliers = fliers[np.linspace(0, len(fliers) - 1, max_fliers).round()
+                        .astype(int)]
+    return {
+        "med": med,
+        "q1": q1,
+        "q3": q3,
+        "whislo": values[inside].min() if inside.any() else q1,
+        "whishi": values[inside].max() if inside.any() else q3,
+        "fliers": fliers,
+        "max": values.max(),
+    }
+
+
+def summary_to_stats(
+    summary: pd.DataFrame,
+    col_with_digits: str,
+    cols_groups: [str],
+) -> pd.DataFrame:
+    """
+    count, mean, std (as pd.DataFrame.std), min, max of a molecule
+    by groups, cols_groups may be some of the groups of the summary
+    (e.g. [big_gr] of a [big_gr, small_gr] summary), then the groups
+    are merged
+
+    Output:
+    ---
+    df indexed by cols_groups, columns: summary_cols + [std]
+    """
+    stats: pd.DataFrame = summary[summary[col_molecule] == col_with_digits]
+    keys: [pd.Series] = [stats[col] for col in cols_groups]
+    count: pd.Series = stats["count"].groupby(keys).transform("sum")
+    mean: pd.Series = (
+        (stats["count"] * stats["mean"]).groupby(keys).transform("sum") / count
+    )
+    stats = stats.assign(
+        mean=mean,
+        m2=stats["m2"] + stats["count"] * (stats["mean"] - mean) ** 2,
+    )
+    stats = stats.groupby(cols_groups).agg(
+        {"count": "sum", "mean": "first", "m2": "sum", "min": "min",
+         "max": "max"}
+    )
+    stats["std"] = np.sqrt(stats["m2"] / (stats["count"] - 1))
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="summary (count, mean, m2, min, max) of a big table "
+        "for drawing barplots"
+    )
+    parser.add_argument("data", help="csv or parquet file with data")
+    parser.add_argument("--groups", nargs="+", required=True)
+    parser.add_argument("--digits", nargs="+", required=True)
+    parser.add_argument("--chunksize", type=int, default=1_000_000)
+    parser.add_argument("--output", default="./summary.csv")
+    args = parser.parse_args()
+
+    summarise_file(
+        args.data, args.groups, args.digits, args.chunksize
+    ).to_csv(args.output, index=False)
@@ -0,0 +1,125 @@
+import pandas as pd
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+
+from drawBarplot import (
+    aggregate_groups,
+    draw_barplot_means_sds,
+    draw_simple_barplot_means_sds,
+    whiskers_y,
+)
+
+
+class BarplotTemplate:
+    """
+    a barplot drawn once (by draw_barplot_means_sds or
+    draw_simple_barplot_means_sds) and then only updated with new data,
+    e.g. one molecule after another in a report or a live dashboard,
+    update changes heights of the bars, whiskers, signif_markers, y limits
+    and the title, no artists are created again (grid, legend, ticks
+    and labels stay as they are), the figure is redrawn by fig.savefig
+    or fig.canvas.draw_idle()
+
+    Input:
+    ---
+    draw_function - draw_barplot_means_sds or draw_simple_barplot_means_sds
+    ax - axes to draw on (default: the current axes, plt.gca())
+    kwargs - arguments of draw_function (without ax), draw_points
+             is not supported (the number of points changes with data)
+    """
+
+    def __init__(self, draw_function, ax: mpl.axes.Axes = None, **kwargs):
+        if draw_function is draw_barplot_means_sds:
+            self.group_cols: [str] = [
+                kwargs["col_big_group"], kwargs["col_small_group"]
+            ]
+            self.groups: pd.Index = pd.MultiIndex.from_product(
+                [kwargs["order_big_group"], kwargs["order_small_group"]]
+            )
+            self.markers_keys: [str] = [
+                big_group + "_" + small_group
+                for big_group, small_group in self.groups
+            ]
+        elif draw_function is draw_simple_barplot_means_sds:
+            self.group_cols: [str] = [kwargs["col_group"]]
+            self.groups: pd.Index = pd.Index(kwargs["order_group"])
+            self.markers_keys: [str] = list(self.groups)
+        else:
+            raise ValueError(
+                "draw_function should be draw_barplot_means_sds "
+                "or draw_simple_barplot_means_sds"
+            )
+        if kwargs.get("draw_points", False):
+            raise ValueError("templates are drawn without draw_points")
+
+        if ax is None:
+            ax = plt.gca()
+        self.kwargs: dict = kwargs
+        self.errorbar = kwargs.get("errorbar")
+        if self.errorbar is None:
+            self.errorbar = "sem" if kwargs.get("use_sem", False) else "sd"
+        texts_before: int = len(ax.texts)
+        self.ax: mpl.axes.Axes = draw_function(ax=ax, **kwargs)
+        # artists of draw_bars_with_caps and the signif_markers
+        self.bars: mpl.container.BarContainer = self.ax.containers[-1]
+        self.whiskers: mpl.lines.Line2D = self.ax.lines[-1]
+        self.markers: [mpl.text.Text] = self.ax.texts[texts_before:]
+
+    def update(
+        self,
+        col_with_digits: str,
+        main_title: str = None,
+        tab_with_data: pd.DataFrame = None,
+        tab_with_signif_markers: pd.DataFrame = None,
+    ) -> mpl.axes.Axes:
+        """
+        draws col_with_digits (of the same or of a new tab_with_data)
+        on the template
+
+        Input:
+        ---
+        col_with_digits - name of the column with digits for which we draw
+        main_title - title of the graph (default: the title is not changed)
+        tab_with_data - df with data (default: the one of the first draw)
+        tab_with_signif_markers - markers (default: the ones of the first draw)
+
+        Output:
+        ---
+        a graph (barplot) - mpl.axes.Axes object
+        """
+        if tab_with_data is None:
+            tab_with_data = self.kwargs["tab_with_data"]
+        if tab_with_signif_markers is None:
+            tab_with_signif_markers = self.kwargs["tab_with_signif_markers"]
+
+        stats: pd.DataFrame = aggregate_groups(
+            tab_with_data,
+            col_with_digits,
+            self.group_cols,
+            self.groups,
+            self.errorbar,
+            self.kwargs.get("n_boot", 10_000),
+            self.kwargs.get("seed", 0),
+        )
+        # the same limits and heights of markers as in draw_function
+        extra_space_above_cap = 1.17
+        maks_val: float = (
+            stats["mean"].max() + stats["err"].max()
+        ) * extra_space_above_cap
+        signif_makrers_heights: pd.Series = (
+            stats["mean"] + stats["err"] + maks_val * 0.1
+        )
+
+        for bar, height in zip(self.bars, stats["mean"]):
+            bar.set_height(height)
+        self.whiskers.set_ydata(whiskers_y(stats))
+        self.ax.set_ylim([0, maks_val * 1.1])
+        for marker, key, height in zip(
+            self.markers, self.markers_keys, signif_makrers_heights
+        ):
+            marker.set_y(height)
+            marker.set_text(tab_with_signif_markers.loc[col_with_digits, key])
+        if main_title is not None:
+            self.ax.set_title(label=main_title)
+
+        return self.ax
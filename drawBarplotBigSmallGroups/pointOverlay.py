@@ -0,0 +1,149 @@
+import numpy as np
+import matplotlib as mpl
+from matplotlib.colors import LinearSegmentedColormap, to_rgb, to_rgba
+
+golden_ratio: float = (np.sqrt(5) - 1) / 2
+
+
+def jitter_offsets(n: int, width: float) -> np.ndarray:
+    """
+    deterministic jitter, n offsets spread evenly over (-width/2, width/2)
+    (golden ratio sequence, the same data give the same picture)
+    """
+    return ((np.arange(n) * golden_ratio) % 1 - 0.5) * width
+
+
+def swarm_offsets(
+    values: np.ndarray, width: float, point_width: float, point_height: float
+) -> np.ndarray:
+    """
+    binned beeswarm, points with values closer than point_height share
+    a bin and are put side by side (0, +1, -1, +2, -2, ... point_width),
+    bins wider than width are squeezed to width
+
+    Input:
+    ---
+    values - y of the points
+    width - max width of a swarm (data units of x)
+    point_width - diameter of a point (data units of x)
+    point_height - diameter of a point (data units of y)
+
+    Output:
+    ---
+    x offsets of the points (from the center of the swarm)
+    """
+    bins: np.ndarray = np.floor(values / point_height).astype(np.int64)
+    order: np.ndarray = np.argsort(bins, kind="stable")
+    sorted_bins: np.ndarray = bins[order]
+    starts: np.ndarray = np.flatnonzero(
+        np.r_[True, sorted_bins[1:] != sorted_bins[:-1]]
+    )
+    counts: np.ndarray = np.diff(np.r_[starts, len(values)])
+    rank: np.ndarray = np.arange(len(values)) - np.repeat(starts, counts)
+    side: np.ndarray = np.where(rank % 2 == 1, 1, -1)
+    offsets: np.ndarray = (rank + 1) // 2 * side * point_width
+    # even counts would lean to one side, shift them by half a point
+    offsets = offsets - np.repeat((counts % 2 == 0) * point_width / 2, counts)
+    scale: np.ndarray = np.minimum(
+        1, (width - point_width) / np.maximum(counts - 1, 1) / point_width
+    )
+    result: np.ndarray = np.empty(len(values))
+    result[order] = offsets * np.repeat(np.maximum(scale, 0), counts)
+    return result
+
+
+def draw_density_strip(
+    ax: mpl.axes.Axes,
+    values: np.ndarray,
+    x: float,
+    width: float,
+    color: (float),
+    ylim: (float, float),
+    nbins: int = 60,
+    zorder: int = 3,
+) -> None:
+    # histogram of values drawn as a vertical strip, the more points
+    # the darker the strip (it lies on a bar of the same color)
+    counts, edges = np.histogram(values, bins=nbins, range=ylim)
+    dark: np.ndarray = np.array(to_rgb(color)) * 0.3
+    cmap = LinearSegmentedColormap.from_list(
+        "density", [to_rgba(dark, 0), to_rgba(dark, 0.9)]
+    )
+    ax.imshow(
+        counts[:, None],
+        extent=(x - width / 4, x + width / 4, edges[0], edges[-1]),
+        origin="lower",
+        aspect="auto",
+        cmap=cmap,
+        interpolation="nearest",
+        zorder=zorder,
+    )
+
+
+def draw_points_overlay(
+    ax: mpl.axes.Axes,
+    values_by_group: [np.ndarray],
+    x: [float],
+    width: float,
+    colors: [(float)],
+    mode: str = "swarm",
+    max_points: int = 500,
+    size: float = 15,
+    zorder: int = 3,
+) -> None:
+    """
+    overlays points on bars/boxes, much faster than sns.swarmplot,
+    all the points are one artist (ax.scatter), groups with more than
+    max_points points are drawn as density strips (see draw_density_strip)
+
+    Input:
+    ---
+    ax - axes to draw on (with the final x and y limits already set)
+    values_by_group - values of the points of every group (bar)
+    x - centers of the groups (bars)
+    width - max width of a group of points (data units of x)
+    colors - colors of the groups
+    mode - "swarm" (binned beeswarm) or "jitter" (deterministic jitter)
+    max_points - above that number of points a group is drawn as density
+    size - diameter of a point (in points, as in sns.swarmplot)
+    zorder - zorder of the points
+    """
+    bbox = ax.get_window_extent()
+    xlim: (float, float) = ax.get_xlim()
+    ylim: (float, float) = ax.get_ylim()
+    size_px: float = size * ax.figure.dpi / 72
+    point_width: float = size_px * (xlim[1] - xlim[0]) / bbox.width
+    point_height: float = size_px * (ylim[1] - ylim[0]) / bbox.height
+
+    xs: [np.ndarray] = []
+    ys: [np.ndarray] = []
+    point_colors: [np.ndarray] = []
+    for values, center, color in zip(values_by_group, x, colors):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) > max_points:
+            draw_density_strip(ax, values, center, width, color, ylim,
+                               zorder=zorder)
+            continue
+        if mode == "jitter":
+            offsets = jitter_offsets(len(values), max(width - point_width, 0))
+        elif mode == "swarm":
+            offsets = swarm_offsets(values, width, point_width, point_height)
+        else:
+            raise ValueError("mode should be 'swarm' or 'jitter'")
+        xs.append(center + offsets)
+        ys.append(values)
+        point_colors.append(np.tile(to_rgba(color), (len(values), 1)))
+
+    if len(xs) == 0:
+        return
+    ax.scatter(
+        np.concatenate(xs),
+        np.concatenate(ys),
+        s=size**2,  # size is the diameter
+        c=np.concatenate(point_colors),
+        edgecolors="black",
+        linewidths=2,
+        alpha=0.5,
+        zorder=zorder,
+    )
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import matplotlib as mpl
+import seaborn as sns
+
+from groupStats import col_molecule, is_summary, summary_cols
+
+# figures (files) memoized by a hash of everything they are drawn from:
+# the figure (without "output"), the columns of data and rows of markers
+# it uses, versions of the libraries, the code that draws it and rcParams
+figures_dir: str = "./.cache/figures"
+digit_keys: [str] = ["col_with_digits", "cols_with_digits"]
+group_keys: [str] = ["col_big_group", "col_small_group", "col_group"]
+source_files: [str] = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), file_name)
+    for file_name in [
+        "drawBarplot.py", "groupStats.py", "pointOverlay.py", "bootstrapCI.py",
+        "batchPlots.py",
+    ]
+]
+
+
+def get_figure_columns(figure: dict, keys: [str]) -> [str]:
+    columns: [str] = []
+    for key in keys:
+        value = figure.get(key, [])
+        columns.extend([value] if isinstance(value, str) else value)
+    return columns
+
+
+def get_table_digest(table: pd.DataFrame) -> str:
+    return hashlib.sha1(
+        pd.util.hash_pandas_object(table, index=True).to_numpy().tobytes()
+    ).hexdigest()
+
+
+def get_environment_digest() -> str:
+    """
+    hash of versions of the libraries, source code of the draw functions
+    and rcParams (a new version of any of them may change the figures)
+    """
+    digest = hashlib.sha1()
+    for version in [mpl.__version__, sns.__version__, pd.__version__,
+                    np.__version__]:
+        digest.update(version.encode("utf-8"))
+    for path in source_files:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    params: dict = {
+        key: value for key, value in mpl.rcParams.items() if key != "backend"
+    }
+    digest.update(repr(sorted(params.items())).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    cache of saved figures (see batchPlots.py) on disk (figures_dir),
+    the least recently used files are removed above max_bytes in total,
+    hits/misses are counted in self.stats
+
+    Input:
+    ---
+    figures_dir - directory with the cached files
+    max_bytes - size limit of the cached files
+    """
+
+    def __init__(
+        self, figures_dir: str = figures_dir, max_bytes: int = 256 * 2**20
+    ):
+        self.figures_dir: str = figures_dir
+        self.max_bytes: int = max_bytes
+        self.environment: str = get_environment_digest()
+        self.digests: dict = {}  # hashes of columns are computed once
+        self.stats: dict = {"hits": 0, "misses": 0}
+
+    def get_digest(self, part: tuple, compute) -> str:
+        # the same columns of a table are shared by many figures
+        if part not in self.digests:
+            self.digests[part] = get_table_digest(compute())
+        return self.digests[part]
+
+    def get_key(
+        self,
+        figure: dict,
+        tab_with_data: pd.DataFrame,
+        tab_with_signif_markers: pd.DataFrame,
+    ) -> str:
+        """
+        hash of the figure (see batchPlots.read_figures) and of the data
+        it is drawn from (tab_with_data and tab_with_signif_markers
+        of the figure)
+        """
+        spec: dict = {
+            key: value for key, value in figure.items() if key != "output"
+        }
+        rows: [str] = get_figure_columns(figure, digit_keys)
+        columns: [str] = get_figure_columns(figure, group_keys)
+        if is_summary(tab_with_data):
+            columns += [col_molecule] + summary_cols
+        else:
+            columns += rows
+        key: str = json.dumps(spec, sort_keys=True) + self.environment
+        key += self.get_digest(
+            ("data", figure["data"], *columns),
+            lambda: tab_with_data[columns],
+        )
+        key += self.get_digest(
+            ("markers", figure["markers"], *rows),
+            lambda: tab_with_signif_markers.reindex(rows),
+        )
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def get_path(self, key: str, output: str) -> str:
+        extension: str = os.path.splitext(output)[1]
+        return os.path.join(self.figures_dir, key + extension)
+
+    def get(self, key: str, outputs: [str]) -> bool:
+        """
+        copies the cached files of key to outputs,
+        False if any of them is not in the cache (nothing is copied)
+        """
+        paths: [str] = [self.get_path(key, output) for output in outputs]
+        if not all(os.path.exists(path) for path in paths):
+            self.stats["misses"] += 1
+            return False
+        for path, output in zip(paths, outputs):
+            os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+            shutil.copyfile(path, output)
+            os.utime(path)  # recently used
+        self.stats["hits"] += 1
+        return True
+
+    def put(self, key: str, outputs: [str]) -> None:
+        os.makedirs(self.figures_dir, exist_ok=True)
+        for output in outputs:
+            shutil.copyfile(output, self.get_path(key, output))
+        self.evict()
+
+    def evict(self) -> None:
+        files: [str] = [
+            os.path.join(self.figures_dir, file_name)
+            for file_name in os.listdir(self.figures_dir)
+        ]
+        files.sort(key=os.path.getmtime, reverse=True)
+        total: int = 0
+        for path in files:
+            total += os.path.getsize(path)
+            if total > self.max_bytes:
+                os.remove(path)
+
+    def __str__(self) -> str:
+        return "render cache: {} hits, {} misses".format(
+            self.stats["hits"], self.stats["misses"]
+        )
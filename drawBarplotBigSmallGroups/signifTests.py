@@ -0,0 +1,274 @@
+import argparse
+import string
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from groupStats import is_summary, summary_to_stats
+
+# a marker of a group (bar) lists letters of the groups it differs from,
+# "a" - the first group (in the order of bars), "b" - the second, etc.,
+# e.g. "ac" - significantly different from the first and the third group
+tests: [str] = ["ttest", "welch", "mannwhitney"]
+corrections: [str] = ["none", "bonferroni", "holm", "bh"]
+
+
+def group_moments(
+    tab_with_data: pd.DataFrame,
+    cols_digits: [str],
+    cols_groups: [str],
+    groups: pd.Index,
+) -> (np.ndarray, np.ndarray, np.ndarray):
+    """
+    counts, means and variances of every molecule in every group,
+    arrays [groups, molecules], tab_with_data may be a summary
+    (see groupStats.summarise_file)
+    """
+    if is_summary(tab_with_data):
+        moments: [pd.DataFrame] = [
+            summary_to_stats(tab_with_data, col, cols_groups).reindex(groups)
+            for col in cols_digits
+        ]
+        count: np.ndarray = np.column_stack([m["count"] for m in moments])
+        mean: np.ndarray = np.column_stack([m["mean"] for m in moments])
+        var: np.ndarray = np.column_stack([m["std"] ** 2 for m in moments])
+        return count, mean, var
+    moments: pd.DataFrame = (
+        tab_with_data.groupby(cols_groups)[cols_digits]
+        .agg(["count", "mean", "var"])
+        .reindex(groups)
+    )
+    return (
+        moments.xs("count", axis=1, level=1).to_numpy(dtype=float),
+        moments.xs("mean", axis=1, level=1).to_numpy(dtype=float),
+        moments.xs("var", axis=1, level=1).to_numpy(dtype=float),
+    )
+
+
+def t_tests(
+    count: np.ndarray,
+    mean: np.ndarray,
+    var: np.ndarray,
+    first: np.ndarray,
+    second: np.ndarray,
+    equal_var: bool,
+) -> np.ndarray:
+    """
+    two-sided p-values of t-tests (Student's or Welch's) of all the pairs
+    of groups (first[i] vs second[i]) for all the molecules at once
+
+    Output:
+    ---
+    array [pairs, molecules]
+    """
+    n1, n2 = count[first], count[second]
+    v1, v2 = var[first], var[second]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if equal_var:
+            dof: np.ndarray = n1 + n2 - 2
+            pooled: np.ndarray = ((n1 - 1) * v1 + (n2 - 1) * v2) / dof
+            se: np.ndarray = np.sqrt(pooled * (1 / n1 + 1 / n2))
+        else:
+            se1, se2 = v1 / n1, v2 / n2
+            se: np.ndarray = np.sqrt(se1 + se2)
+            dof: np.ndarray = (se1 + se2) ** 2 / (
+                se1**2 / (n1 - 1) + se2**2 / (n2 - 1)
+            )
+        t: np.ndarray = (mean[first] - mean[second]) / se
+    return 2 * stats.t.sf(np.abs(t), dof)
+
+
+def mann_whitney_tests(
+    values_by_group: [np.ndarray], first: np.ndarray, second: np.ndarray
+) -> np.ndarray:
+    """
+    two-sided p-values of Mann-Whitney U tests of all the pairs of groups,
+    every pair is tested for all the molecules at once
+
+    Input:
+    ---
+    values_by_group - arrays [rows of a group, molecules]
+    first, second - indexes of groups of the pairs
+
+    Output:
+    ---
+    array [pairs, molecules]
+    """
+    p_values: np.ndarray = np.full(
+        (len(first), values_by_group[0].shape[1]), np.nan
+    )
+    for i, (a, b) in enumerate(zip(first, second)):
+        x, y = values_by_group[a], values_by_group[b]
+        if len(x) == 0 or len(y) == 0:
+            continue
+        p_values[i] = stats.mannwhitneyu(x, y, axis=0).pvalue
+        # molecules with missing values are tested again without them
+        # (slower, so only these ones)
+        with_nans: np.ndarray = np.isnan(x).any(axis=0) | np.isnan(y).any(
+            axis=0
+        )
+        if with_nans.any():
+            p_values[i, with_nans] = stats.mannwhitneyu(
+                x[:, with_nans], y[:, with_nans], axis=0, nan_policy="omit"
+            ).pvalue
+    return p_values
+
+
+def adjust_p_values(p_values: np.ndarray, correction: str) -> np.ndarray:
+    """
+    multiple comparisons correction of p-values [tests, molecules],
+    tests of every molecule (column) are one family, NaNs are not counted
+
+    Input:
+    ---
+    p_values - array [tests, molecules]
+    correction - "none", "bonferroni", "holm" (Holm-Bonferroni)
+                 or "bh" (Benjamini-Hochberg, false discovery rate)
+
+    Output:
+    ---
+    adjusted p-values (the same shape)
+    """
+    if correction == "none":
+        return p_values
+    m: np.ndarray = np.sum(~np.isnan(p_values), axis=0)
+    if correction == "bonferroni":
+        return np.minimum(p_values * m, 1)
+    # NaNs are sorted last, rank - position in the sorted p-values
+    order: np.ndarray = np.argsort(p_values, axis=0)
+    ordered: np.ndarray = np.take_along_axis(p_values, order, axis=0)
+    rank: np.ndarray = np.arange(len(p_values))[:, None]
+    if correction == "holm":
+        adjusted: np.ndarray = np.fmax.accumulate(ordered * (m - rank), axis=0)
+    elif correction == "bh":
+        adjusted: np.ndarray = np.fmin.accumulate(
+            (ordered * m / (rank + 1))[::-1], axis=0
+        )[::-1]
+    else:
+        raise ValueError("correction should be one of: " + ", ".join(
+            corrections
+        ))
+    result: np.ndarray = np.empty_like(p_values)
+    np.put_along_axis(result, order, np.minimum(adjusted, 1), axis=0)
+    return np.where(np.isnan(p_values), np.nan, result)
+
+
+def get_signif_markers(
+    tab_with_data: pd.DataFrame,
+    cols_digits: [str],
+    cols_groups: [str],
+    orders_groups: [[str]],
+    test: str = "welch",
+    correction: str = "holm",
+    alpha: float = 0.05,
+) -> pd.DataFrame:
+    """
+    compares every two groups for every molecule and writes the results
+    as signif_markers (like mock_markers.csv) for the draw functions
+
+    Input:
+    ---
+    tab_with_data - df with oryginal data, columns: [val1, val2, gr1, gr2]
+                    or its summary (see groupStats.summarise_file,
+                    only for t-tests)
+    cols_digits - names of the columns with digits (molecules)
+    cols_groups - names of the columns with groups, e.g. [big_gr, small_gr]
+                  or [gr] (for draw_simple_barplot_means_sds)
+    orders_groups - order of groups of every column of cols_groups,
+                    e.g. [order_big_group, order_small_group]
+    test - "ttest" (Student's), "welch" (Welch's t-test)
+           or "mannwhitney" (Mann-Whitney U test)
+    correction - "none", "bonferroni", "holm" or "bh" (see adjust_p_values),
+                 all the comparisons of a molecule are one family
+    alpha - significance level (of adjusted p-values)
+
+    Output:
+    ---
+    df, col_names: [bg1_sg1, bg1_sg2, bg2_sg1, ...] (or [gr1, gr2, ...]),
+    row_names=[val1, val2, ...], e.g. "ac" - the group differs from
+    the first and the third group ("" - from none of them)
+    """
+    if test not in tests:
+        raise ValueError("test should be one of: " + ", ".join(tests))
+    if test == "mannwhitney" and is_summary(tab_with_data):
+        raise ValueError("mannwhitney needs oryginal data, not a summary")
+
+    groups: pd.Index = (
+        pd.MultiIndex.from_product(orders_groups)
+        if len(cols_groups) > 1
+        else pd.Index(orders_groups[0])
+    )
+    if len(groups) > len(string.ascii_lowercase):
+        raise ValueError("at most 26 groups (one letter per group)")
+    first, second = np.triu_indices(len(groups), k=1)
+
+    if test == "mannwhitney":
+        positions: dict = tab_with_data.groupby(
+            cols_groups if len(cols_groups) > 1 else cols_groups[0]
+        ).indices
+        values: np.ndarray = tab_with_data[cols_digits].to_numpy(dtype=float)
+        p_values: np.ndarray = mann_whitney_tests(
+            [values[positions.get(group, [])] for group in groups],
+            first,
+            second,
+        )
+    else:
+        p_values: np.ndarray = t_tests(
+            *group_moments(tab_with_data, cols_digits, cols_groups, groups),
+            first,
+            second,
+            equal_var=test == "ttest",
+        )
+    significant: np.ndarray = adjust_p_values(p_values, correction) < alpha
+
+    # letters of the groups of the significant pairs, [groups, molecules]
+    letters: np.ndarray = np.array(list(string.ascii_lowercase))
+    markers: np.ndarray = np.full(
+        (len(groups), len(cols_digits)), "", dtype=object
+    )
+    different: np.ndarray = np.zeros(
+        (len(groups), len(groups), len(cols_digits)), dtype=bool
+    )
+    different[first, second] = significant
+    different[second, first] = significant
+    for other in range(len(groups)):
+        markers = markers + np.where(different[:, other], letters[other], "")
+
+    return pd.DataFrame(
+        markers.T,
+        index=cols_digits,
+        columns=[
+            "_".join(group) if len(cols_groups) > 1 else group
+            for group in groups
+        ],
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="pairwise tests of groups, writes signif_markers "
+        "(like mock_markers.csv) for drawing barplots"
+    )
+    parser.add_argument("data", help="csv file with data (or its summary)")
+    parser.add_argument("--groups", nargs="+", required=True,
+                        help="columns with groups, e.g. bg sg")
+    parser.add_argument("--orders", nargs="+", required=True,
+                        help="order of groups of every column, groups "
+                        "separated with commas, e.g. lean,obese m,f")
+    parser.add_argument("--digits", nargs="+", required=True)
+    parser.add_argument("--test", default="welch", choices=tests)
+    parser.add_argument("--correction", default="holm", choices=corrections)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--output", default="./markers.csv")
+    args = parser.parse_args()
+
+    get_signif_markers(
+        pd.read_csv(args.data),
+        args.digits,
+        args.groups,
+        [order.split(",") for order in args.orders],
+        args.test,
+        args.correction,
+        args.alpha,
+    ).to_csv(args.output)
@@ -3,6 +3,7 @@ import numpy as np
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
+from matplotlib.collections import PolyCollection
 
 
 def dfToRowFract(
@@ -45,6 +46,135 @@ def dfToRowFract(
     return result
 
 
+def summaryToMeans(
+    df: pd.DataFrame,
+    cols_bg_sg: [str] = ["bg", "sg"],
+    cols_vals: [str] = ["molecule1", "molecule2"],
+) -> pd.DataFrame:
+
+    """
+    transforms a summary of data (one row per group and molecule, columns:
+    [bg, sg, molecule, count, mean, ...], see groupStats.summarise_file
+    in drawBarplotBigSmallGroups) to means of groups (one row per group)
+
+    Input:
+    ---
+    df - summary to be transformed
+    cols_bg_sg - name of columns with 'big' and 'small' groups
+    cols_vals - name of molecules (they become columns)
+
+    Output:
+    ---
+    new table, columns: [bg, sg, val1, val2], sorted by bg and sg
+    """
+
+    means: pd.DataFrame = df.pivot_table(
+        index=cols_bg_sg, columns="molecule", values="mean", aggfunc="first"
+    )
+
+    return means.loc[:, cols_vals].reset_index().rename_axis(columns=None)
+
+
+def isSummary(df: pd.DataFrame) -> bool:
+    return {"molecule", "count", "mean", "m2"}.issubset(df.columns)
+
+
+def getStackHeights(
+    tab_with_data: pd.DataFrame,
+    col_big_group: str,
+    col_small_group: str,
+    cols_digits: [str],
+    percentage: bool,
+) -> pd.DataFrame:
+
+    """
+    heights of parts of the bars (see draw_groupedStackPlot for the arguments)
+
+    Output:
+    ---
+    table, one row per bar, columns: cols_digits + [bg, sg]
+    """
+
+    tab_data: pd.DataFrame = tab_with_data.copy()
+    if isSummary(tab_data):
+        tab_data = summaryToMeans(
+            df=tab_data,
+            cols_bg_sg=[col_big_group, col_small_group],
+            cols_vals=cols_digits,
+        )
+    tab_data = tab_data.loc[:, cols_digits + [col_big_group, col_small_group]]
+    if percentage:
+        tab_data = dfToRowFract(
+            df=tab_data,
+            cols_bg_sg=[col_big_group, col_small_group],
+            cols_vals=cols_digits,
+            percentage=percentage,
+        )
+
+    return tab_data
+
+
+def stackBars(
+    ax: mpl.axes.Axes,
+    x_pos: [float],
+    heights: np.ndarray,
+    colors: [(float)],
+    bar_width: float,
+) -> PolyCollection:
+
+    """
+    draws stacked bars (layer on layer) as one collection of rectangles,
+    looks like ax.bar called for every layer with bottom=sum of layers below
+
+    Input:
+    ---
+    ax - axes to draw on
+    x_pos - centers of the bars
+    heights - array [layers, bars] with heights of parts of the bars
+              (first layer at the bottom)
+    colors - colors of the layers
+    bar_width - width of a bar
+
+    Output:
+    ---
+    the collection with all the parts of the bars
+    """
+
+    heights = np.asarray(heights, dtype=float)
+    tops: np.ndarray = np.cumsum(heights, axis=0)
+    bottoms: np.ndarray = tops - heights
+    left: np.ndarray = np.broadcast_to(
+        np.asarray(x_pos, dtype=float) - bar_width / 2, heights.shape
+    )
+    right: np.ndarray = left + bar_width
+    # rectangles of the first layer, then of the second, etc.
+    verts: np.ndarray = np.stack(
+        [
+            np.stack([left, bottoms], axis=-1),
+            np.stack([right, bottoms], axis=-1),
+            np.stack([right, tops], axis=-1),
+            np.stack([left, tops], axis=-1),
+        ],
+        axis=2,
+    ).reshape(-1, 4, 2)
+
+    bars: PolyCollection = PolyCollection(
+        verts,
+        facecolors=np.repeat(
+            [mpl.colors.to_rgba(color) for color in colors[: len(heights)]],
+            heights.shape[1],
+            axis=0,
+        ),
+        edgecolors="black",
+        linewidths=mpl.rcParams["patch.linewidth"],
+        joinstyle="miter",  # as in patches drawn by ax.bar
+        zorder=2,
+    )
+    ax.add_collection(bars, autolim=False)
+
+    return bars
+
+
 def draw_groupedStackPlot(
     tab_with_data: pd.DataFrame,
     col_big_group: str,
@@ -59,7 +189,9 @@ def draw_groupedStackPlot(
     y_axis_title: str,
     labels_bars: [str],
     rotation: int,
-) -> mpl.axes:
+    legend_loc: str = "best",
+    ax: mpl.axes.Axes = None,
+) -> mpl.axes.Axes:
 
     """
     draws a stackbarplot (bars in absolute or percentage quota, one on another)
@@ -67,6 +199,7 @@ def draw_groupedStackPlot(
     Input:
     ---
     tab_with_data - df with data (like the one in mock_data.csv)
+                    or its summary (see summaryToMeans)
     col_big_group - name of col with 'big' group
     col_small_group - name of col with 'small' group
     cols_digits - name of cols with digits to (each col new stack layer)
@@ -79,25 +212,29 @@ def draw_groupedStackPlot(
     y_axis_title - title displayed on left of the y axis
     labels_bars - labels displayed below the bars (noOfBars = len(bg)*len(sg))
     rotation - rotation of x_bar's labels
+    legend_loc - location of the legend, "best" is slow for thousands
+                 of bars, e.g. "upper right" is not
+    ax - axes to draw on (default: the current axes, plt.gca())
 
     Output:
     ---
-    a graph (stacked barplot or stacked percentage plot) - mpl.axes object
+    a graph (stacked barplot or stacked percentage plot) - mpl.axes.Axes object
     """
 
-    tab_data: pd.DataFrame = tab_with_data.copy()
-    tab_data = tab_data.loc[:, cols_digits + [col_big_group, col_small_group]]
-    if percentage:
-        tab_data = dfToRowFract(
-            df=tab_data,
-            cols_bg_sg=[col_big_group, col_small_group],
-            cols_vals=cols_digits,
-            percentage=percentage,
-        )
+    if ax is None:
+        ax = plt.gca()
+
+    tab_data: pd.DataFrame = getStackHeights(
+        tab_with_data=tab_with_data,
+        col_big_group=col_big_group,
+        col_small_group=col_small_group,
+        cols_digits=cols_digits,
+        percentage=percentage,
+    )
 
     maxVal: float = tab_data.sum(axis=1).max()
 
-    plt.grid(
+    ax.grid(
         b=True,
         linestyle="dashed",
         which="major",
@@ -108,9 +245,8 @@ def draw_groupedStackPlot(
         zorder=0,
     )
 
-    lenBg: int = len(tab_with_data.loc[:, col_big_group].unique())
-    lenSg: int = len(tab_with_data.loc[:, col_small_group].unique())
-    noOfBars: int = lenBg * lenSg
+    lenBg: int = len(tab_data.loc[:, col_big_group].unique())
+    lenSg: int = len(tab_data.loc[:, col_small_group].unique())
     ticks_big: [int] = list(range(lenBg))
     bar_width: float = 1 / (lenSg + 2)  # 1 is the distance between ticks_big
 
@@ -125,26 +261,16 @@ def draw_groupedStackPlot(
         )
     ]
 
-    bottoms: [float] = [0] * noOfBars
-
-    for i in range(len(order_cols_digits)):
-
-        heights = list(tab_data.loc[:, order_cols_digits[i]])
-        plt.bar(
-            x=x_pos,
-            height=heights,
-            bottom=bottoms,
-            color=colors_digits[i],
-            edgecolor="black",
-            width=bar_width,
-            zorder=2,
-        )
-
-        bottoms = list(map(lambda x, y: x + y, bottoms, heights))
+    stackBars(
+        ax=ax,
+        x_pos=x_pos,
+        heights=tab_data.loc[:, order_cols_digits].to_numpy().T,
+        colors=colors_digits,
+        bar_width=bar_width,
+    )
 
-    axes = plt.gca()
-    axes.set_ylim([0, maxVal * 1.3])
-    axes.set_xlim([x_pos[0] - bar_width, x_pos[-1] + bar_width])
+    ax.set_ylim([0, maxVal * 1.3])
+    ax.set_xlim([x_pos[0] - bar_width, x_pos[-1] + bar_width])
 
     handles1: [mpatches.Patch] = []
     for i in range(len(order_cols_digits)):
@@ -157,11 +283,84 @@ def draw_groupedStackPlot(
             )
         )
 
-    plt.legend(handles=handles1, loc="best")
+    ax.legend(handles=handles1, loc=legend_loc)
+
+    ax.set_title(label=main_title)
+    ax.set_xlabel(xlabel=x_axis_title)
+    ax.set_ylabel(ylabel=y_axis_title)
+    ax.set_xticks(x_pos)
+    ax.set_xticklabels(labels_bars, rotation=rotation)
+
+    return ax
+
+
+class StackPlotTemplate:
+
+    """
+    a grouped stacked barplot drawn once (by draw_groupedStackPlot) and then
+    only updated with new data (the same groups and cols_digits), e.g. one
+    cohort after another in a report or a live dashboard, update changes
+    bottoms and tops of parts of the bars, y limits and the title,
+    no artists are created again, the figure is redrawn by fig.savefig
+    or fig.canvas.draw_idle()
+
+    Input:
+    ---
+    ax - axes to draw on (default: the current axes, plt.gca())
+    kwargs - arguments of draw_groupedStackPlot (without ax)
+    """
+
+    def __init__(self, ax: mpl.axes.Axes = None, **kwargs):
+        if ax is None:
+            ax = plt.gca()
+        self.kwargs: dict = kwargs
+        self.ax: mpl.axes.Axes = draw_groupedStackPlot(ax=ax, **kwargs)
+        self.bars: PolyCollection = self.ax.collections[-1]  # see stackBars
+        # rectangles (4 corners) of the first layer, then of the second, etc.
+        self.verts: np.ndarray = np.array(
+            [path.vertices[:4] for path in self.bars.get_paths()]
+        )
+
+    def update(
+        self, tab_with_data: pd.DataFrame, main_title: str = None
+    ) -> mpl.axes.Axes:
+
+        """
+        draws new tab_with_data (see draw_groupedStackPlot) on the template
+
+        Input:
+        ---
+        tab_with_data - df with data (like the one in mock_data.csv)
+                        or its summary (see summaryToMeans)
+        main_title - title of the graph (default: the title is not changed)
+
+        Output:
+        ---
+        a graph (stacked barplot or stacked percentage plot) - mpl.axes.Axes
+        """
+
+        tab_data: pd.DataFrame = getStackHeights(
+            tab_with_data=tab_with_data,
+            col_big_group=self.kwargs["col_big_group"],
+            col_small_group=self.kwargs["col_small_group"],
+            cols_digits=self.kwargs["cols_digits"],
+            percentage=self.kwargs["percentage"],
+        )
+        heights: np.ndarray = (
+            tab_data.loc[:, self.kwargs["order_cols_digits"]]
+            .to_numpy(dtype=float)
+            .T
+        )
+        if heights.size != len(self.verts):
+            raise ValueError("new data should have the same groups")
+        tops: np.ndarray = np.cumsum(heights, axis=0)
+        bottoms: np.ndarray = tops - heights
 
-    plt.title(label=main_title)
-    plt.xlabel(xlabel=x_axis_title)
-    plt.ylabel(ylabel=y_axis_title)
-    plt.xticks(ticks=x_pos, labels=labels_bars, rotation=rotation)
+        self.verts[:, :2, 1] = bottoms.reshape(-1, 1)
+        self.verts[:, 2:, 1] = tops.reshape(-1, 1)
+        self.bars.set_verts(self.verts)
+        self.ax.set_ylim([0, tab_data.sum(axis=1).max() * 1.3])
+        if main_title is not None:
+            self.ax.set_title(label=main_title)
 
-    # return 0
+        return self.ax
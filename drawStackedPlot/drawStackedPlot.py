@@ -1,7 +1,9 @@
 import pandas as pd
+import numpy as np
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
+from matplotlib.collections import PolyCollection
 
 
 def dfToColFract(df: pd.DataFrame, percentage: bool = True) -> pd.DataFrame:
@@ -28,6 +30,93 @@ def dfToColFract(df: pd.DataFrame, percentage: bool = True) -> pd.DataFrame:
         return fractions
 
 
+def getStackHeights(
+    tab_with_data: pd.DataFrame,
+    groups_names: [str],
+    molecules_names: [str],
+    order_groups: [str],
+    order_molecules: [str],
+    percentage: bool,
+) -> pd.DataFrame:
+
+    """
+    heights of parts of the bars (see draw_stackPlot for the arguments)
+
+    Output:
+    ---
+    table, cols: order_groups (bars), indxs: order_molecules (bottom to top)
+    """
+
+    tab_data: pd.DataFrame = tab_with_data.copy()
+    tab_data = tab_data.loc[molecules_names, groups_names]
+
+    if percentage:
+        tab_data = dfToColFract(tab_data, True)
+
+    return tab_data.loc[order_molecules, order_groups]
+
+
+def stackBars(
+    ax: mpl.axes.Axes,
+    x_pos: [float],
+    heights: np.ndarray,
+    colors: [(float)],
+    bar_width: float,
+) -> PolyCollection:
+
+    """
+    draws stacked bars (layer on layer) as one collection of rectangles,
+    looks like ax.bar called for every layer with bottom=sum of layers below
+
+    Input:
+    ---
+    ax - axes to draw on
+    x_pos - centers of the bars
+    heights - array [layers, bars] with heights of parts of the bars
+              (first layer at the bottom)
+    colors - colors of the layers
+    bar_width - width of a bar
+
+    Output:
+    ---
+    the collection with all the parts of the bars
+    """
+
+    heights = np.asarray(heights, dtype=float)
+    tops: np.ndarray = np.cumsum(heights, axis=0)
+    bottoms: np.ndarray = tops - heights
+    left: np.ndarray = np.broadcast_to(
+        np.asarray(x_pos, dtype=float) - bar_width / 2, heights.shape
+    )
+    right: np.ndarray = left + bar_width
+    # rectangles of the first layer, then of the second, etc.
+    verts: np.ndarray = np.stack(
+        [
+            np.stack([left, bottoms], axis=-1),
+            np.stack([right, bottoms], axis=-1),
+            np.stack([right, tops], axis=-1),
+            np.stack([left, tops], axis=-1),
+        ],
+        axis=2,
+    ).reshape(-1, 4, 2)
+
+    bars: PolyCollection = PolyCollection(
+        verts,
+        facecolors=np.repeat(
+            [mpl.colors.to_rgba(color) for color in colors[: len(heights)]],
+            heights.shape[1],
+            axis=0,
+        ),
+        edgecolors="black",
+        linewidths=mpl.rcParams["patch.linewidth"],
+        joinstyle="miter",  # as in patches drawn by ax.bar
+        zorder=2,
+    )
+    ax.add_collection(bars, autolim=False)
+
+    return bars
+
+
 def draw_stackPlot(
     tab_with_data: pd.DataFrame,
     groups_names: [str],
@@ -41,7 +130,9 @@ def draw_stackPlot(
     y_axis_title: str,
     x_axis_title: str,
     percentage: bool,
-) -> mpl.axes:
+    legend_loc: str = "best",
+    ax: mpl.axes.Axes = None,
+) -> mpl.axes.Axes:
 
     """
     draws a stackbarplot (bars in absolute or percentage quota, one on another)
@@ -61,23 +152,30 @@ def draw_stackPlot(
     y_axis_title - title on the y-axis (over y-axis, on the left)
     x_axis_title - title on the (under) x-axis
     percentage - should y axis represent absolute values or pct (upto 100%)
+    legend_loc - location of the legend, "best" is slow for thousands
+                 of bars, e.g. "upper right" is not
+    ax - axes to draw on (default: the current axes, plt.gca())
 
     Output:
     ---
-    a graph (stacked barplot or stacked percentage plot) - mpl.axes object
+    a graph (stacked barplot or stacked percentage plot) - mpl.axes.Axes object
     """
 
-    tab_data: pd.DataFrame = tab_with_data.copy()
-    tab_data = tab_data.loc[molecules_names, groups_names]
-
-    if percentage:
-        tab_data = dfToColFract(tab_data, True)
+    if ax is None:
+        ax = plt.gca()
 
-    tab_data = tab_data.loc[order_molecules, order_groups]
+    tab_data: pd.DataFrame = getStackHeights(
+        tab_with_data=tab_with_data,
+        groups_names=groups_names,
+        molecules_names=molecules_names,
+        order_groups=order_groups,
+        order_molecules=order_molecules,
+        percentage=percentage,
+    )
 
     maxVal: float = tab_data.sum(axis=0).max()
 
-    plt.grid(
+    ax.grid(
         b=True,
         linestyle="dashed",
         which="major",
@@ -91,26 +189,16 @@ def draw_stackPlot(
     x_pos: [int] = list(range(len(groups_names)))
     bar_width: float = 0.5
 
-    bottoms: [float] = [0] * len(groups_names)
-
-    for i in range(len(order_molecules)):
-        heights = list(tab_data.loc[order_molecules[i], :])
-
-        plt.bar(
-            x=x_pos,
-            height=heights,
-            bottom=bottoms,
-            color=colors_molecules[i],
-            edgecolor="black",
-            width=bar_width,
-            zorder=2,
-        )
-
-        bottoms = list(map(lambda x, y: x + y, bottoms, heights))
+    stackBars(
+        ax=ax,
+        x_pos=x_pos,
+        heights=tab_data.to_numpy(),
+        colors=colors_molecules,
+        bar_width=bar_width,
+    )
 
-    axes = plt.gca()
-    axes.set_ylim([0, maxVal * 1.2])
-    axes.set_xlim([0 - bar_width, max(x_pos) + bar_width])
+    ax.set_ylim([0, maxVal * 1.2])
+    ax.set_xlim([0 - bar_width, max(x_pos) + bar_width])
 
     handles1: [mpatches.Patch] = []
     for i in range(len(order_molecules)):
@@ -123,11 +211,78 @@ def draw_stackPlot(
             )
         )
 
-    plt.legend(handles=handles1, loc="best")
+    ax.legend(handles=handles1, loc=legend_loc)
+
+    ax.set_title(label=main_title)
+    ax.set_xlabel(xlabel=x_axis_title)
+    ax.set_ylabel(ylabel=y_axis_title)
+    ax.set_xticks(x_pos)
+    ax.set_xticklabels(labels_groups)
+
+    return ax
+
+
+class StackPlotTemplate:
+
+    """
+    a stacked barplot drawn once (by draw_stackPlot) and then only updated
+    with new data (the same groups and molecules), e.g. one sample after
+    another in a report or a live dashboard, update changes bottoms and
+    tops of parts of the bars, y limits and the title, no artists are
+    created again, the figure is redrawn by fig.savefig
+    or fig.canvas.draw_idle()
+
+    Input:
+    ---
+    ax - axes to draw on (default: the current axes, plt.gca())
+    kwargs - arguments of draw_stackPlot (without ax)
+    """
+
+    def __init__(self, ax: mpl.axes.Axes = None, **kwargs):
+        if ax is None:
+            ax = plt.gca()
+        self.kwargs: dict = kwargs
+        self.ax: mpl.axes.Axes = draw_stackPlot(ax=ax, **kwargs)
+        self.bars: PolyCollection = self.ax.collections[-1]  # see stackBars
+        # rectangles (4 corners) of the first layer, then of the second, etc.
+        self.verts: np.ndarray = np.array(
+            [path.vertices[:4] for path in self.bars.get_paths()]
+        )
+
+    def update(
+        self, tab_with_data: pd.DataFrame, main_title: str = None
+    ) -> mpl.axes.Axes:
+
+        """
+        draws new tab_with_data (see draw_stackPlot) on the template
+
+        Input:
+        ---
+        tab_with_data - cols: [gr1vals, gr2vals,...], indxs: [submol1,...]
+        main_title - title of the graph (default: the title is not changed)
+
+        Output:
+        ---
+        a graph (stacked barplot or stacked percentage plot) - mpl.axes.Axes
+        """
+
+        tab_data: pd.DataFrame = getStackHeights(
+            tab_with_data=tab_with_data,
+            groups_names=self.kwargs["groups_names"],
+            molecules_names=self.kwargs["molecules_names"],
+            order_groups=self.kwargs["order_groups"],
+            order_molecules=self.kwargs["order_molecules"],
+            percentage=self.kwargs["percentage"],
+        )
+        heights: np.ndarray = tab_data.to_numpy(dtype=float)
+        tops: np.ndarray = np.cumsum(heights, axis=0)
+        bottoms: np.ndarray = tops - heights
 
-    plt.title(label=main_title)
-    plt.xlabel(xlabel=x_axis_title)
-    plt.ylabel(ylabel=y_axis_title)
-    plt.xticks(ticks=x_pos, labels=labels_groups)
+        self.verts[:, :2, 1] = bottoms.reshape(-1, 1)
+        self.verts[:, 2:, 1] = tops.reshape(-1, 1)
+        self.bars.set_verts(self.verts)
+        self.ax.set_ylim([0, tab_data.sum(axis=0).max() * 1.2])
+        if main_title is not None:
+            self.ax.set_title(label=main_title)
 
-    # return 0
+        return self.ax
@@ -0,0 +1,269 @@
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from fuzzyTitles import fillIFsByTitles, loadTrigramIndex
+from ifHistory import getIfTrends, historyCols, readStore
+from loadJournals import (
+    loadIfs,
+    loadIfsByIssn,
+    loadJournals,
+    readJournalsChunks,
+)
+from queryForJournals import (
+    buildIssnIndex,
+    disciplinesMask,
+    disciplinesNoneMask,
+    disciplinesOrMask,
+    getIFsForJournals,
+    lookupIFs,
+    lowerTitles,
+    matchKeywords,
+    menPointsMask,
+    saveJournals,
+)
+from ranking import (
+    getCachedRanks,
+    getRankKeys,
+    loadRankCache,
+    mergeTopK,
+    saveRankCache,
+    topK,
+)
+from resultCache import (
+    ResultCache,
+    getDataFingerprint,
+    getResultKey,
+    resultsDir,
+)
+
+# a query is a dict (see queries.json), missing keys get these values
+defaultQuery = {
+    "points": [],
+    "disciplinesAnd": [],
+    "disciplinesOr": [],
+    "disciplinesNone": [],
+    "keywordsIncludeOr": [],
+    "keywordsExcludeOr": [],
+}
+
+
+def readQueries(path):
+    with open(path, encoding="utf-8") as f:
+        queries = json.load(f)
+    return [{**defaultQuery, **query} for query in queries]
+
+
+def getMask(cache, key, compute):
+    # masks are shared between queries that use the same criterion
+    if key not in cache:
+        cache[key] = compute()
+    return cache[key]
+
+
+def queryMask(df, query, cache, titles):
+    pts = sorted(query["points"])
+    disciplinesAnd = sorted(query["disciplinesAnd"])
+    disciplinesOr = sorted(query["disciplinesOr"])
+    disciplinesNone = sorted(query["disciplinesNone"])
+    include = sorted(query["keywordsIncludeOr"])
+    exclude = sorted(query["keywordsExcludeOr"])
+
+    mask = pd.Series(True, index=df.index)
+    if len(pts) > 0:
+        mask &= getMask(cache, ("points", tuple(pts)),
+                        lambda: menPointsMask(df, pts))
+    mask &= getMask(cache, ("disciplinesAnd", tuple(disciplinesAnd)),
+                    lambda: disciplinesMask(df, disciplinesAnd))
+    mask &= getMask(cache, ("disciplinesOr", tuple(disciplinesOr)),
+                    lambda: disciplinesOrMask(df, disciplinesOr))
+    mask &= getMask(cache, ("disciplinesNone", tuple(disciplinesNone)),
+                    lambda: disciplinesNoneMask(df, disciplinesNone))
+    if len(include) > 0:
+        mask &= getMask(cache, ("keywords", tuple(include)),
+                        lambda: matchKeywords(titles, include).notna())
+    if len(exclude) > 0:
+        mask &= ~getMask(cache, ("keywords", tuple(exclude)),
+                         lambda: matchKeywords(titles, exclude).notna())
+    return mask
+
+
+def runQueries(queries, df, dfIfs, trigramIndex=None, ifStore=None,
+               rankCache=None, resultCache=None):
+    """
+    evaluates all the queries against df (data are read only once),
+    writes the results to query["output"] and returns them as
+    {query["name"]: pd.DataFrame},
+    with trigramIndex (see fuzzyTitles) journals not found by issn
+    get IF of the journal with the most similar title,
+    with ifStore (see ifHistory) IF trends over the years are added,
+    queries with "top"/"rankBy"/"weights" return the best journals first
+    (see ranking), rankCache - ranks of the whole list reused between calls,
+    resultCache (see resultCache) - results of the same queries on the same
+    data are not evaluated again
+    """
+    results = {}
+    keys = {}
+    if resultCache is not None:
+        fingerprint = getDataFingerprint(
+            df, dfIfs, trigramIndex is not None,
+            *([] if ifStore is None else [ifStore["years"], ifStore["ifs"]]))
+        for query in queries:
+            keys[query["name"]] = getResultKey(query, fingerprint)
+            result = resultCache.get(keys[query["name"]])
+            if result is not None:
+                results[query["name"]] = result
+    missing = [query for query in queries if query["name"] not in results]
+
+    if len(missing) > 0:
+        results.update(evaluateQueries(missing, df, dfIfs, trigramIndex,
+                                       ifStore, rankCache))
+    for query in queries:
+        if query in missing and resultCache is not None:
+            resultCache.put(keys[query["name"]], results[query["name"]])
+        saveJournals(results[query["name"]], query["output"], header=True)
+    return {query["name"]: results[query["name"]] for query in queries}
+
+
+def evaluateQueries(queries, df, dfIfs, trigramIndex=None, ifStore=None,
+                    rankCache=None):
+    cache = {}
+    titles = lowerTitles(df)
+    masks = [queryMask(df, query, cache, titles) for query in queries]
+    ifs = getIFsForJournals(df, dfIfs, issnIndex=buildIssnIndex(dfIfs))
+    selected = np.zeros(len(df), dtype=bool)
+    for rows in masks:
+        selected |= rows.to_numpy()
+    if trigramIndex is not None:
+        ifs[selected] = fillIFsByTitles(df[selected], ifs[selected], dfIfs,
+                                        trigramIndex)
+        rankCache = {}  # IFs found by titles depend on the queries
+    if rankCache is None:
+        rankCache = {}
+    if ifStore is not None:
+        trends = getIfTrends(df[selected], ifStore)
+    results = {}
+    for query, rows in zip(queries, masks):
+        keys = getRankKeys(query)
+        if len(keys) > 0 or "top" in query:
+            positions = topK(
+                [getCachedRanks(rankCache, df, ifs, key) for key in keys],
+                rows, query.get("top", len(df)))
+            rows = df.index[positions]
+        result = df.loc[rows].copy()
+        result.insert(loc=1, column="IF", value=ifs[rows])
+        if ifStore is not None:
+            insertIfTrends(result, trends)
+        results[query["name"]] = result
+    return results
+
+
+def insertIfTrends(result, trends):
+    # IF trends (see ifHistory.getIfTrends) go right after the IF column
+    for i, col in enumerate(historyCols):
+        result.insert(loc=2 + i, column=col,
+                      value=trends.loc[result.index, col])
+
+
+def streamQueries(queries, journalsPath, ifsPath, chunkSize=10000,
+                  ifStore=None):
+    """
+    the same as runQueries, but the list of journals is read in pieces
+    (chunkSize rows), matching rows are appended to query["output"],
+    only the issn -> IF lookup (and the memory mapped ifStore,
+    see ifHistory) stays in memory the whole time,
+    ranked queries keep their running top k (see ranking.mergeTopK)
+    and are written at the end
+    """
+    for query in queries:
+        if query.get("weights"):
+            raise ValueError(
+                "query {}: weights are scaled over the whole list, they "
+                "cannot be used with a list read in pieces".format(
+                    query["name"]))
+    ranked = {query["name"]: getRankKeys(query) for query in queries
+              if len(getRankKeys(query)) > 0 or "top" in query}
+    best = {}
+    ifsByIssn = loadIfsByIssn(ifsPath)
+    for i, chunk in enumerate(readJournalsChunks(journalsPath, chunkSize)):
+        cache = {}
+        titles = lowerTitles(chunk)
+        masks = [queryMask(chunk, query, cache, titles) for query in queries]
+        if ifStore is not None:
+            selected = np.zeros(len(chunk), dtype=bool)
+            for rows in masks:
+                selected |= rows.to_numpy()
+            trends = getIfTrends(chunk[selected], ifStore)
+        for query, rows in zip(queries, masks):
+            result = chunk[rows].copy()
+            result.insert(loc=1, column="IF",
+                          value=lookupIFs(result, ifsByIssn))
+            if ifStore is not None:
+                insertIfTrends(result, trends)
+            if query["name"] in ranked:
+                best[query["name"]] = mergeTopK(
+                    best.get(query["name"]), result, ranked[query["name"]],
+                    query.get("top", np.iinfo(np.int64).max))
+            else:
+                saveJournals(result, query["output"], header=i == 0,
+                             mode="w" if i == 0 else "a")
+    for query in queries:
+        if query["name"] in best:
+            saveJournals(best[query["name"]], query["output"], header=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="runs many journal queries in one go")
+    parser.add_argument("queries", help="json file with a list of queries")
+    parser.add_argument("--journals", default="./listOfJournals.csv")
+    parser.add_argument("--ifs", default="./if_list.csv")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="parse the source files again, skip .cache")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="read the list of journals in pieces of "
+                        "that many rows (bounded memory, no cache)")
+    parser.add_argument("--fuzzy-titles", action="store_true",
+                        help="journals not found by issn are looked up "
+                        "by title (not with --chunk-size)")
+    parser.add_argument("--if-history", default=None,
+                        help="directory with IF history (see ifHistory.py),"
+                        " adds IF trend columns to the results")
+    parser.add_argument("--result-cache-mb", type=float, default=256,
+                        help="size limit of the results cached on disk")
+    args = parser.parse_args()
+    if args.chunk_size is not None and args.fuzzy_titles:
+        # titles are matched against the whole scimago file,
+        # a list read in pieces keeps only the issn -> IF lookup
+        parser.error("--fuzzy-titles cannot be used with --chunk-size")
+
+    if args.chunk_size is None:
+        rankCache = {}
+        resultCache = None
+        if not args.no_cache:
+            rankCache = loadRankCache(args.journals, args.ifs)
+            resultCache = ResultCache(resultsDir=resultsDir,
+                                      maxBytes=args.result_cache_mb * 2**20)
+        runQueries(
+            readQueries(args.queries),
+            loadJournals(args.journals, useCache=not args.no_cache),
+            loadIfs(args.ifs, useCache=not args.no_cache),
+            loadTrigramIndex(args.ifs) if args.fuzzy_titles else None,
+            None if args.if_history is None else readStore(args.if_history),
+            rankCache,
+            resultCache,
+        )
+        if not args.no_cache and not args.fuzzy_titles:
+            saveRankCache(rankCache, args.journals, args.ifs)
+        if resultCache is not None:
+            print(resultCache)
+    else:
+        streamQueries(
+            readQueries(args.queries),
+            args.journals,
+            args.ifs,
+            args.chunk_size,
+            None if args.if_history is None else readStore(args.if_history),
+        )
@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from loadJournals import loadJournals, readIfs, readJournals
+from queryForJournals import (
+    buildIssnIndex,
+    disciplineCodes,
+    disciplinesMask,
+    getIFsForJournals,
+    menPointsMask,
+    saveJournals,
+    titleCriteriaMask,
+)
+
+titleWords = [
+    "Acta", "Annales", "Archiwum", "Biuletyn", "Czasopismo", "Folia",
+    "Journal", "Kwartalnik", "Postępy", "Przegląd", "Rocznik", "Studia",
+    "Zeszyty", "Polski", "Polskie", "Naukowe", "Medycyna", "Farmacja",
+    "Biologii", "Chemii", "Fizyki", "Historii", "Prawa", "Ekonomii",
+    "Diabetes", "Obesity", "Lipid", "Molecular", "Disease", "Research",
+    "Clinical", "Reviews", "Łódzkie", "Śląskie", "Gdańskie",
+    "Wrocławskie",
+]
+menPoints = [20, 40, 70, 100, 140, 200]
+
+
+def getIssnCheckDigit(digits):
+    check = (11 - sum((8 - i) * d for i, d in enumerate(digits)) % 11) % 11
+    return "X" if check == 10 else str(check)
+
+
+def getRandomIssns(rng, n):
+    digits = rng.integers(0, 10, size=(n, 7))
+    return [
+        "".join(map(str, row[:4])) + "-" + "".join(map(str, row[4:]))
+        + getIssnCheckDigit(row)
+        for row in digits
+    ]
+
+
+def getRandomTitles(rng, n):
+    lengths = rng.integers(2, 7, size=n)
+    words = rng.choice(titleWords, size=(n, 6))
+    return [" ".join(row[:k]) for row, k in zip(words, lengths)]
+
+
+def makeJournals(n, seed=0):
+    """
+    synthetic list of journals (like listOfJournals.csv) with n rows,
+    ~1/3 of the journals have a second title, ~10% miss the issn
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "lp": np.arange(1, n + 1),
+        "uid": rng.permutation(n) + 1,
+        "tytul1": getRandomTitles(rng, n),
+        "issn1": getRandomIssns(rng, n),
+        "E-issn1": getRandomIssns(rng, n),
+        "tytul2": getRandomTitles(rng, n),
+        "issn2": getRandomIssns(rng, n),
+        "E-issn2": getRandomIssns(rng, n),
+        "Punkty": rng.choice(menPoints, size=n),
+    })
+    df.loc[rng.random(n) < 0.1, "issn1"] = None
+    df.loc[rng.random(n) < 0.67, ["tytul2", "issn2", "E-issn2"]] = None
+    marks = rng.random((n, len(disciplineCodes))) < 0.05
+    for i, code in enumerate(disciplineCodes):
+        df[code] = np.where(marks[:, i], "x", None)
+    return df
+
+
+def makeIfs(dfJournals, seed=0):
+    """
+    synthetic scimago file (like if_list.csv) for ~70% of dfJournals,
+    issns without '-' and separated with ', ' as in the original
+    """
+    rng = np.random.default_rng(seed)
+    found = dfJournals[rng.random(len(dfJournals)) < 0.7]
+    issns = found["issn1"].fillna(found["E-issn1"]).str.replace("-", "")
+    eIssns = found["E-issn1"].str.replace("-", "")
+    return pd.DataFrame({
+        "Rank": np.arange(1, len(found) + 1),
+        "Title": found["tytul1"].to_numpy(),
+        "Issn": (issns + ", " + eIssns).to_numpy(),
+        "Cites / Doc. (2years)": rng.gamma(2, 1.5, size=len(found)).round(2),
+    })
+
+
+def measure(results, n, stage, fun):
+    # tracemalloc slows allocations down a lot, so the time and
+    # the peak memory come from two separate runs of fun
+    start = time.perf_counter()
+    value = fun()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    fun()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    results.append({"rows": n, "stage": stage, "seconds": seconds,
+                    "peakMB": peak / 2**20})
+    print("{:>9} rows  {:<18} {:9.4f} s {:9.1f} MB".format(
+        n, stage, seconds, peak / 2**20))
+    return value
+
+
+def benchmark(n, tmpDir, results):
+    journalsPath = os.path.join(tmpDir, "journals{}.csv".format(n))
+    ifsPath = os.path.join(tmpDir, "ifs{}.csv".format(n))
+    dfJournals = makeJournals(n)
+    dfJournals.to_csv(journalsPath, index=False)
+    makeIfs(dfJournals).to_csv(ifsPath, sep=";", decimal=",", index=False)
+    del dfJournals
+
+    df = measure(results, n, "load", lambda: readJournals(journalsPath))
+    dfIfs = measure(results, n, "load scimago", lambda: readIfs(ifsPath))
+    loadJournals(journalsPath)
+    measure(results, n, "load cached", lambda: loadJournals(journalsPath))
+    pts = measure(results, n, "points filter",
+                  lambda: menPointsMask(df, [140, 100]))
+    disciplines = measure(results, n, "discipline filter",
+                          lambda: disciplinesMask(df, ["302"]))
+    keywords = measure(results, n, "keyword filter",
+                       lambda: titleCriteriaMask(df))
+    result = df[pts & disciplines & keywords].copy()
+    ifs = measure(results, n, "IF join", lambda: getIFsForJournals(
+        result, dfIfs, issnIndex=buildIssnIndex(dfIfs)))
+    result.insert(loc=1, column="IF", value=ifs)
+    measure(results, n, "write", lambda: saveJournals(
+        result, os.path.join(tmpDir, "result.csv"), header=True))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="times the stages of a journal query on synthetic data")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--output", default="./benchmark.json",
+                        help="json file with the results")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmpDir:
+        cwd = os.getcwd()
+        os.chdir(tmpDir)  # caches of loadJournals go to tmpDir too
+        try:
+            for n in args.sizes:
+                benchmark(n, tmpDir, results)
+        finally:
+            os.chdir(cwd)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "results": results,
+        }, f, indent=4)
@@ -0,0 +1,109 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from loadJournals import cacheDir, getCachePath, rmOldCaches
+from queryForJournals import titleCols
+
+# trigram index of titles (see buildTrigramIndex) is a dict of arrays:
+# keys - sorted trigrams, rows[offsets[i]:offsets[i + 1]] - positions of
+# the titles containing keys[i], sizes - number of trigrams in every title
+trigramIndexKeys = ["keys", "offsets", "rows", "sizes"]
+
+
+def normTitles(titles):
+    # "Acta Physiologica (Łódź)" -> "acta physiologica lodz"
+    return (
+        pd.Series(titles, dtype="string")
+        .str.lower()
+        .str.replace("ł", "l", regex=False)
+        .str.normalize("NFKD")
+        .str.encode("ascii", errors="ignore")
+        .str.decode("ascii")
+        .str.replace(r"[^a-z0-9]+", " ", regex=True)
+        .str.strip()
+        .fillna("")
+    )
+
+
+def getTrigrams(title):
+    title = " " + title + " "
+    return {title[i:i + 3] for i in range(len(title) - 2)}
+
+
+def buildTrigramIndex(titles):
+    trigrams, rows = [], []
+    for row, title in enumerate(normTitles(titles)):
+        titleTrigrams = getTrigrams(title)
+        trigrams.extend(titleTrigrams)
+        rows.extend([row] * len(titleTrigrams))
+    trigrams = np.array(trigrams, dtype="<U3")
+    rows = np.array(rows, dtype=np.int32)
+    order = np.argsort(trigrams, kind="stable")
+    keys, starts = np.unique(trigrams[order], return_index=True)
+    return {
+        "keys": keys,
+        "offsets": np.append(starts, len(trigrams)).astype(np.int64),
+        "rows": rows[order],
+        "sizes": np.bincount(rows, minlength=len(titles)).astype(np.int32),
+    }
+
+
+def loadTrigramIndex(path="./if_list.csv", colWithTitles="Title"):
+    # built once for a given scimago file, then read from .cache
+    cachePath = getCachePath(path, "_trigrams", ".npz")
+    if os.path.exists(cachePath):
+        with np.load(cachePath) as cached:
+            return {key: cached[key] for key in trigramIndexKeys}
+    titles = pd.read_csv(path, sep=";", usecols=[colWithTitles])
+    index = buildTrigramIndex(titles[colWithTitles])
+    os.makedirs(cacheDir, exist_ok=True)
+    np.savez(cachePath, **index)
+    rmOldCaches(cachePath)
+    return index
+
+
+def findTitle(index, title, threshold=0.8):
+    """
+    returns (row, score) of the title from the index most similar to title,
+    score - Dice coefficient of trigrams (0-1), row is -1 if score < threshold
+    """
+    trigrams = np.array(sorted(getTrigrams(normTitles([title])[0])),
+                        dtype="<U3")
+    keys = index["keys"]
+    if len(trigrams) == 0 or len(keys) == 0:
+        return -1, 0.0
+    positions = np.minimum(np.searchsorted(keys, trigrams), len(keys) - 1)
+    positions = positions[keys[positions] == trigrams]
+    if len(positions) == 0:
+        return -1, 0.0
+    candidates, shared = np.unique(
+        np.concatenate([
+            index["rows"][index["offsets"][p]:index["offsets"][p + 1]]
+            for p in positions
+        ]),
+        return_counts=True,
+    )
+    scores = 2 * shared / (len(trigrams) + index["sizes"][candidates])
+    best = scores.argmax()
+    if scores[best] < threshold:
+        return -1, float(scores[best])
+    return int(candidates[best]), float(scores[best])
+
+
+def fillIFsByTitles(df, ifs, dfIfs, index, threshold=0.8,
+                    colWithIFs="Cites / Doc. (2years)"):
+    # IFs of journals not found by issn (NaN in ifs) are looked up
+    # by the most similar title (titleCols of df) in the trigram index
+    ifs = ifs.copy()
+    for idx in ifs.index[ifs.isna()]:
+        for col in titleCols:
+            title = df.at[idx, col]
+            if pd.isna(title):
+                continue
+            row, _ = findTitle(index, title, threshold)
+            if row >= 0:
+                ifs[idx] = dfIfs[colWithIFs].iloc[row]
+                break
+    return ifs
@@ -0,0 +1,146 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from queryForJournals import buildIssnIndex, issnCols, normIssns
+
+# IFs from many yearly scimago files, stored as .npy arrays in storePath:
+# issns.npy - sorted normalized issns (8 characters), years.npy - sorted
+# years, ifs.npy - float64 matrix [issn, year], NaN if not in the file
+# of that year (float32 in stores written before, see asFloat64)
+storePath = "./.cache/ifHistory"
+issnLength = 8
+historyCols = ["IF latest", "IF mean", "IF min", "IF slope"]
+
+
+def readStore(storePath=storePath, mmap=True):
+    mode = "r" if mmap else None
+    if not os.path.exists(os.path.join(storePath, "ifs.npy")):
+        return {
+            "issns": np.array([], dtype="<U8"),
+            "years": np.array([], dtype=np.int32),
+            "ifs": np.zeros((0, 0), dtype=np.float64),
+        }
+    return {
+        name: np.load(os.path.join(storePath, name + ".npy"), mmap_mode=mode)
+        for name in ["issns", "years", "ifs"]
+    }
+
+
+def saveStore(store, storePath=storePath):
+    os.makedirs(storePath, exist_ok=True)
+    for name, array in store.items():
+        np.save(os.path.join(storePath, name + ".npy"), array)
+
+
+def asFloat64(ifs):
+    # float32 IFs (older stores) via their shortest text form,
+    # so that e.g. 1.9 does not become 1.899999976158142
+    if ifs.dtype == np.float32:
+        return ifs.astype(str).astype(np.float64)
+    return np.asarray(ifs, dtype=np.float64)
+
+
+def validIssns(issns):
+    # normalized issns (see normIssns), malformed ones become "",
+    # so that they are not truncated to a wrong issn by the "<U8" dtype
+    issns = normIssns(issns).fillna("")
+    return issns.where(issns.str.len() == issnLength, "").to_numpy(
+        dtype="<U8")
+
+
+def addYear(year, path, storePath=storePath,
+            colWithIFs="Cites / Doc. (2years)"):
+    # ingests scimago file (path) of a given year, replaces that year
+    # if it is already in the store
+    dfIfs = pd.read_csv(path, sep=";", decimal=",",
+                        usecols=["Issn", colWithIFs])
+    issnIndex = buildIssnIndex(dfIfs)
+    issnIndex = issnIndex[issnIndex.index.str.len() == issnLength]
+    newIfs = pd.Series(
+        dfIfs[colWithIFs].to_numpy(dtype=np.float64)[issnIndex.to_numpy()],
+        index=issnIndex.index.astype("<U8"),
+    )
+
+    store = readStore(storePath, mmap=False)
+    years = np.union1d(store["years"], [year]).astype(np.int32)
+    issns = np.union1d(store["issns"], newIfs.index.to_numpy()).astype("<U8")
+    ifs = np.full((len(issns), len(years)), np.nan, dtype=np.float64)
+    ifs[np.ix_(np.searchsorted(issns, store["issns"]),
+               np.searchsorted(years, store["years"]))] = asFloat64(
+        store["ifs"])
+    ifs[np.searchsorted(issns, newIfs.index.to_numpy()),
+        np.searchsorted(years, year)] = newIfs.to_numpy()
+    saveStore({"issns": issns, "years": years, "ifs": ifs}, storePath)
+
+
+def findIssns(store, issns):
+    # positions of issns in the store, -1 if not there
+    issns = validIssns(issns)
+    if len(store["issns"]) == 0:
+        return np.full(len(issns), -1)
+    positions = np.minimum(np.searchsorted(store["issns"], issns),
+                           len(store["issns"]) - 1)
+    return np.where(store["issns"][positions] == issns, positions, -1)
+
+
+def getIfTrends(df, store, issnCols=issnCols):
+    """
+    latest, mean, min IF and slope of IF (per year, least squares)
+    over the years in the store for every journal (row) in df,
+    the first issn column of df (in order of issnCols) found in the store
+    is used, NaN for journals not found
+    """
+    rows = np.full(len(df), -1)
+    for col in [col for col in issnCols if col in df.columns]:
+        missing = rows == -1
+        rows[missing] = findIssns(store, df[col].to_numpy()[missing])
+
+    nYears = len(store["years"])
+    ifs = np.full((len(df), nYears), np.nan, dtype=np.float64)
+    found = rows >= 0
+    ifs[found] = asFloat64(store["ifs"][rows[found]])
+
+    known = ~np.isnan(ifs)
+    counts = known.sum(axis=1)
+    latest = np.full(len(df), np.nan)
+    if nYears > 0:
+        lastKnown = nYears - 1 - np.argmax(known[:, ::-1], axis=1)
+        latest = np.where(counts > 0, ifs[np.arange(len(df)), lastKnown],
+                          np.nan)
+
+    years = np.asarray(store["years"], dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        meanYear = (known * years).sum(axis=1) / counts
+        meanIf = np.nansum(ifs, axis=1) / counts
+        dx = np.where(known, years - meanYear[:, None], 0)
+        dy = np.where(known, ifs - meanIf[:, None], 0)
+        slope = (dx * dy).sum(axis=1) / (dx * dx).sum(axis=1)
+        minIf = np.where(counts > 0,
+                         np.min(np.where(known, ifs, np.inf), axis=1,
+                                initial=np.inf),
+                         np.nan)
+    slope[counts < 2] = np.nan
+
+    return pd.DataFrame(
+        {
+            historyCols[0]: latest,
+            historyCols[1]: meanIf,
+            historyCols[2]: minIf,
+            historyCols[3]: slope,
+        },
+        index=df.index,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="adds a yearly scimago file to the IF history")
+    parser.add_argument("year", type=int)
+    parser.add_argument("scimago", help="scimago csv file of that year")
+    parser.add_argument("--store", default=storePath)
+    args = parser.parse_args()
+
+    addYear(args.year, args.scimago, args.store)
@@ -0,0 +1,177 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from loadJournals import (
+    cacheDir,
+    getCachePath,
+    getFileHash,
+    loadIfs,
+    loadJournals,
+    rmOldCaches,
+)
+from queryForJournals import (
+    buildIssnIndex,
+    disciplineBits,
+    disciplineCodes,
+    disciplinesCol,
+    getIFsForJournals,
+    pointsCol,
+)
+
+# cube of journals: arrays [discipline, points, IF band] with
+# count, sum, min and max of IF (min/max are NaN for empty cells),
+# IF bands: (-inf, edges[0]), [edges[0], edges[1]), ..., [edges[-1], inf)
+# and the last band for journals without IF,
+# a journal is counted in every discipline it belongs to and once
+# in the last discipline anyCode (journals of any of the disciplines)
+cubeArrays = ["codes", "points", "edges", "count", "ifSum", "ifMin", "ifMax"]
+anyCode = "any"
+cubeCodes = np.array(disciplineCodes + [anyCode])
+
+
+def getIfEdges(ifs, nBands=10):
+    # quantiles of IF (e.g. deciles) as edges of the bands
+    known = ifs[~np.isnan(ifs)]
+    if len(known) == 0:
+        return np.array([])
+    return np.unique(np.quantile(known, np.linspace(0, 1, nBands + 1)[1:-1]))
+
+
+def buildCube(df, ifs, ifEdges=None):
+    ifs = pd.to_numeric(ifs, errors="coerce").to_numpy(dtype=float)
+    edges = getIfEdges(ifs) if ifEdges is None else np.sort(ifEdges)
+    points = np.sort(df[pointsCol].dropna().unique())
+
+    bits = df[disciplinesCol].to_numpy(dtype=np.uint64)
+    shifts = np.array([disciplineBits[c] for c in disciplineCodes])
+    members = (bits[:, None] >> shifts[None, :].astype(np.uint64)) & 1 == 1
+    members = np.column_stack([members, members.any(axis=1)])
+    rows, codes = np.nonzero(members)
+
+    pointsPos = np.searchsorted(points, df[pointsCol].to_numpy())
+    hasPoints = df[pointsCol].notna().to_numpy()
+    bands = np.where(np.isnan(ifs), len(edges) + 1,
+                     np.searchsorted(edges, ifs, side="right"))
+
+    keep = hasPoints[rows]
+    rows, codes = rows[keep], codes[keep]
+    shape = (len(cubeCodes), len(points), len(edges) + 2)
+    cells = np.ravel_multi_index(
+        (codes, pointsPos[rows], bands[rows]), shape)
+    size = int(np.prod(shape))
+
+    known = ~np.isnan(ifs[rows])
+    ifMin = np.full(size, np.inf)
+    ifMax = np.full(size, -np.inf)
+    np.minimum.at(ifMin, cells[known], ifs[rows][known])
+    np.maximum.at(ifMax, cells[known], ifs[rows][known])
+    return {
+        "codes": cubeCodes,
+        "points": points,
+        "edges": edges,
+        "count": np.bincount(cells, minlength=size).reshape(shape),
+        "ifSum": np.bincount(cells[known], weights=ifs[rows][known],
+                             minlength=size).reshape(shape),
+        "ifMin": np.where(np.isinf(ifMin), np.nan, ifMin).reshape(shape),
+        "ifMax": np.where(np.isinf(ifMax), np.nan, ifMax).reshape(shape),
+    }
+
+
+def loadCube(journalsPath="./listOfJournals.csv", ifsPath="./if_list.csv",
+             ifEdges=None):
+    # the cube is rebuilt whenever the list of journals, the scimago file
+    # or the requested IF edges (None - IF deciles) change
+    cachePath = getCachePath(journalsPath, "_cube", ".npz")
+    ifsHash = getFileHash(ifsPath)
+    if os.path.exists(cachePath):
+        with np.load(cachePath) as cached:
+            if ("ifDeciles" in cached.files
+                    and np.array_equal(cached["codes"], cubeCodes)
+                    and str(cached["ifsHash"]) == ifsHash
+                    and bool(cached["ifDeciles"]) == (ifEdges is None)
+                    and (ifEdges is None or np.array_equal(
+                        cached["edges"], np.sort(ifEdges)))):
+                return {name: cached[name] for name in cubeArrays}
+    df = loadJournals(journalsPath)
+    dfIfs = loadIfs(ifsPath)
+    ifs = getIFsForJournals(df, dfIfs, issnIndex=buildIssnIndex(dfIfs))
+    cube = buildCube(df, ifs, ifEdges)
+    os.makedirs(cacheDir, exist_ok=True)
+    np.savez(cachePath, ifsHash=ifsHash, ifDeciles=ifEdges is None, **cube)
+    rmOldCaches(cachePath)
+    return cube
+
+
+def getPositions(values, allValues, what):
+    if values is None:
+        return np.arange(len(allValues))
+    positions = [np.flatnonzero(allValues == v) for v in values]
+    if any(len(p) == 0 for p in positions):
+        raise ValueError("{} not in the cube: {}".format(what, values))
+    return np.concatenate(positions)
+
+
+def getSummary(cube, discipline=None, points=None, ifAbove=None,
+               withoutIf=False):
+    """
+    number of journals and their IF (mean, min, max) in the cells
+    of the cube, discipline - one code, None - journals of any discipline
+    (every journal counted once), points - list, None - all points,
+    ifAbove - must be one of the edges (IF >= ifAbove),
+    withoutIf - count journals without IF too (only if ifAbove is None)
+    """
+    codes = getPositions(
+        [anyCode if discipline is None else str(discipline)],
+        cube["codes"], "discipline")
+    pts = getPositions(points, cube["points"], "points")
+    nBands = len(cube["edges"]) + 1
+    if ifAbove is None:
+        bands = np.arange(nBands + 1 if withoutIf else nBands)
+    else:
+        edge = np.flatnonzero(np.isclose(cube["edges"], ifAbove))
+        if len(edge) == 0:
+            raise ValueError(
+                "IF {} is not an edge of the IF bands {}, rebuild the cube "
+                "with it (loadCube(ifEdges=...))".format(
+                    ifAbove, list(cube["edges"])))
+        bands = np.arange(edge[0] + 1, nBands)
+
+    cells = np.ix_(codes, pts, bands)
+    count = int(cube["count"][cells].sum())
+    ifCells = np.ix_(codes, pts, bands[bands < nBands])
+    withIf = int(cube["count"][ifCells].sum())
+    if withIf == 0:
+        return {"count": count, "IF mean": np.nan, "IF min": np.nan,
+                "IF max": np.nan}
+    return {
+        "count": count,
+        "IF mean": cube["ifSum"][ifCells].sum() / withIf,
+        "IF min": np.nanmin(cube["ifMin"][ifCells]),
+        "IF max": np.nanmax(cube["ifMax"][ifCells]),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="number of journals by discipline, points and IF")
+    parser.add_argument("--journals", default="./listOfJournals.csv")
+    parser.add_argument("--ifs", default="./if_list.csv")
+    parser.add_argument("--discipline", default=None,
+                        help="discipline code (default: any discipline)")
+    parser.add_argument("--points", type=int, nargs="+", default=None)
+    parser.add_argument("--if-above", type=float, default=None)
+    parser.add_argument("--without-if", action="store_true",
+                        help="count journals without IF too "
+                        "(not with --if-above)")
+    parser.add_argument("--if-edges", type=float, nargs="+", default=None,
+                        help="edges of IF bands (default: IF deciles)")
+    args = parser.parse_args()
+    if args.without_if and args.if_above is not None:
+        parser.error("--without-if cannot be used with --if-above")
+
+    cube = loadCube(args.journals, args.ifs, args.if_edges)
+    print(getSummary(cube, args.discipline, args.points, args.if_above,
+                     args.without_if))
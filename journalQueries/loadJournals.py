@@ -0,0 +1,198 @@
+import hashlib
+import itertools
+import os
+
+import openpyxl
+import pandas as pd
+
+from queryForJournals import (
+    buildIssnIndex,
+    getIFsByIssn,
+    issnCols,
+    packDisciplines,
+    pointsCol,
+    rowHashCol,
+    titleCols,
+)
+
+cacheDir = "./.cache"
+# change it whenever the format of the cached tables changes
+cacheVersion = 3
+
+# simplified column name (see simplifyColName) -> column name used by
+# queryForJournals, names from different releases of the ministry list
+# (xlsx and hand made csv) end up the same
+journalsColNames = {
+    "lp": "lp",
+    "lp.": "lp",
+    "uid": "uid",
+    "unikatowyidentyfikatorczasopisma": "uid",
+    "tytul1": titleCols[0],
+    "tytul2": titleCols[1],
+    "punkty": pointsCol,
+    "punktacja": pointsCol,
+    "issn": issnCols[0],
+    "issn1": issnCols[0],
+    "e-issn": issnCols[1],
+    "e-issn1": issnCols[1],
+    "issn.1": issnCols[2],
+    "issn2": issnCols[2],
+    "e-issn.1": issnCols[3],
+    "e-issn2": issnCols[3],
+}
+
+
+def simplifyColName(colName):
+    return str(colName).strip().lower().replace(" ", "").replace("ł", "l")
+
+
+def dedupeColNames(colNames):
+    # the same as pd.read_csv does: issn, issn -> issn, issn.1
+    result = []
+    for i, colName in enumerate(colNames):
+        colName = "Unnamed: " + str(i) if colName is None else str(colName)
+        newName, n = colName, 0
+        while newName in result:
+            n += 1
+            newName = colName + "." + str(n)
+        result.append(newName)
+    return result
+
+
+def isDisciplineCode(colName):
+    # 302, 302.0 and "302" are all discipline codes
+    try:
+        code = float(colName)
+    except (TypeError, ValueError):
+        return False
+    return code.is_integer() and code > 0
+
+
+def normalizeJournals(df):
+    # unified column names, discipline codes as strings ("302"),
+    # points as numbers, text columns as pd.StringDtype,
+    # discipline columns packed into one column of bits, hash of every row
+    colNames = {}
+    for colName in df.columns:
+        if isDisciplineCode(colName):
+            colNames[colName] = str(int(float(colName)))
+        else:
+            colNames[colName] = journalsColNames.get(
+                simplifyColName(colName), str(colName))
+    df = df.rename(columns=colNames)
+    df[pointsCol] = pd.to_numeric(df[pointsCol], errors="coerce")
+    for colName in df.columns:
+        if df[colName].dtype == object:
+            df[colName] = df[colName].astype("string")
+    return addRowHashes(packDisciplines(df.reset_index(drop=True)))
+
+
+def addRowHashes(df):
+    # rows with the same content (ignoring "lp", i.e. position on the list)
+    # get the same hash in every release of the list
+    content = df.drop(columns=["lp", rowHashCol], errors="ignore")
+    df[rowHashCol] = pd.util.hash_pandas_object(content, index=False)
+    return df
+
+
+def readXlsxChunks(path, chunkSize, sheetName=None):
+    # read only mode of openpyxl streams the rows instead of building
+    # the whole workbook in memory
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0] if sheetName is None else wb[sheetName]
+        rows = ws.iter_rows(values_only=True)
+        header = dedupeColNames(next(rows))
+        while True:
+            chunk = list(itertools.islice(rows, chunkSize))
+            if len(chunk) == 0:
+                break
+            yield pd.DataFrame.from_records(
+                chunk, columns=header).dropna(how="all")
+    finally:
+        wb.close()
+
+
+def readXlsx(path, sheetName=None):
+    chunks = list(readXlsxChunks(path, 10000, sheetName))
+    return pd.concat(chunks, ignore_index=True)
+
+
+def getFileHash(path):
+    fileHash = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            fileHash.update(chunk)
+    return fileHash.hexdigest()
+
+
+def getCachePath(path, name="", ext=".feather"):
+    # name - distinguishes different caches built from the same file
+    stem = os.path.splitext(os.path.basename(path))[0] + name
+    fileName = "{}-{}_v{}{}".format(
+        stem, getFileHash(path)[:16], cacheVersion, ext)
+    return os.path.join(cacheDir, fileName)
+
+
+def rmOldCaches(cachePath):
+    stem = os.path.basename(cachePath).rsplit("-", 1)[0]
+    for fileName in os.listdir(cacheDir):
+        oldPath = os.path.join(cacheDir, fileName)
+        if fileName.rsplit("-", 1)[0] == stem and oldPath != cachePath:
+            os.remove(oldPath)
+
+
+def loadCached(path, read, useCache=True):
+    # the cache file name contains the hash of the source file,
+    # so a new release of the source is parsed again automatically
+    if not useCache:
+        return read(path)
+    cachePath = getCachePath(path)
+    if os.path.exists(cachePath):
+        return pd.read_feather(cachePath)
+    df = read(path)
+    os.makedirs(cacheDir, exist_ok=True)
+    df.to_feather(cachePath)
+    rmOldCaches(cachePath)
+    return df
+
+
+def readJournals(path):
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        return normalizeJournals(readXlsx(path))
+    return normalizeJournals(pd.read_csv(path))
+
+
+def readJournalsChunks(path, chunkSize=10000):
+    # normalized pieces (chunkSize rows) of the list of journals,
+    # for files that should not be loaded into memory at once
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        chunks = readXlsxChunks(path, chunkSize)
+    else:
+        chunks = pd.read_csv(path, chunksize=chunkSize)
+    for chunk in chunks:
+        yield normalizeJournals(chunk)
+
+
+def readIfs(path):
+    # scimago csv: ';' as separator and ',' as decimal point
+    df = pd.read_csv(path, sep=";", decimal=",")
+    for colName in df.columns:
+        if df[colName].dtype == object:
+            df[colName] = df[colName].astype("string")
+    return df
+
+
+def loadJournals(path="./listOfJournals.csv", useCache=True):
+    return loadCached(path, readJournals, useCache)
+
+
+def loadIfs(path="./if_list.csv", useCache=True):
+    return loadCached(path, readIfs, useCache)
+
+
+def loadIfsByIssn(path="./if_list.csv", colWithIFs="Cites / Doc. (2years)"):
+    # compact issn -> IF lookup, only two columns of scimago file are read
+    dfIfs = pd.read_csv(path, sep=";", decimal=",",
+                        usecols=["Issn", colWithIFs])
+    return getIFsByIssn(dfIfs, buildIssnIndex(dfIfs), colWithIFs)
@@ -1,7 +1,8 @@
-import pandas as pd
+import functools
+import re
 
-df = pd.read_csv("./listOfJournals.csv")
-dfIfPoints = pd.read_csv("./if_list.csv", sep=";")
+import numpy as np
+import pandas as pd
 
 # columns with discipline names (check it with listOfJournals.csv file):
 # 301 - nauki farmaceutyczne; 302- nauki medyczne
@@ -15,24 +16,208 @@ keywordsIncludeOr = [
     "disease",
 ]
 keywordsExcludeOr = ["ame"]
+# columns with ISSNs in listOfJournals.csv (used for joining with if_list.csv)
+issnCols = ["issn1", "E-issn1", "issn2", "E-issn2"]
+
+
+# names of columns in listOfJournals.csv used by the filters below
+titleCols = ["Tytuł 1", "Tytuł 2"]
+pointsCol = "Punktacja"
+
+# discipline codes (columns of listOfJournals.csv), position of a code
+# is its bit in the packed column disciplinesCol (see packDisciplines)
+disciplineCodes = [
+    "101", "102", "103", "104", "105", "106", "107", "108", "109",
+    "201", "202", "203", "204", "205", "206", "207", "208", "209", "210",
+    "211",
+    "301", "302", "303", "304", "305",
+    "401",
+    "501", "502", "503", "504",
+    "601", "602", "603", "604", "605", "606", "607", "608", "609", "610",
+    "611", "612",
+    "701", "702", "703", "704", "705", "706", "707", "708",
+    "801", "802",
+    "901",
+]
+disciplineBits = {code: np.uint64(i) for i, code in enumerate(disciplineCodes)}
+disciplinesCol = "disciplines"
+# unique id of a journal (stable between releases of the list)
+uidCol = "uid"
+# hash of the content of a row (see loadJournals.addRowHashes)
+rowHashCol = "rowHash"
+
+
+# the filters below work on whole columns at once and return boolean masks
+# (pd.Series aligned with df.index), combine them with &, | and ~
+def menPointsMask(df, pts):
+    return df[pointsCol].isin(pts)
+
+
+def disciplineMarked(df, discipline):
+    marks = df[discipline].astype("string").str.strip()
+    return marks.eq("x").fillna(False).astype(bool)
+
+
+def packDisciplines(df):
+    # replaces "x"/blank discipline columns with one uint64 column,
+    # codes outside of disciplineCodes stay as they are
+    codes = [code for code in disciplineCodes if code in df.columns]
+    bits = np.zeros(len(df), dtype=np.uint64)
+    for code in codes:
+        marked = disciplineMarked(df, code).to_numpy()
+        bits[marked] |= np.uint64(1) << disciplineBits[code]
+    df = df.drop(columns=codes)
+    df[disciplinesCol] = bits
+    return df
+
+
+def unpackDisciplines(df):
+    # the opposite of packDisciplines (e.g. before saving df to a file)
+    if disciplinesCol not in df.columns:
+        return df
+    bits = df[disciplinesCol].to_numpy(dtype=np.uint64)
+    df = df.drop(columns=disciplinesCol)
+    for code in disciplineCodes:
+        marked = (bits >> disciplineBits[code]) & np.uint64(1) == 1
+        df[code] = np.where(marked, "x", None)
+    return df
+
+
+def saveJournals(df, path, **kwargs):
+    # internal columns (packed disciplines, row hashes) are not saved
+    df = unpackDisciplines(df).drop(columns=[rowHashCol], errors="ignore")
+    df.to_csv(path, index=False, **kwargs)
+
+
+def toBits(disciplines):
+    bits = np.uint64(0)
+    for discipline in disciplines:
+        bits |= np.uint64(1) << disciplineBits[discipline]
+    return bits
+
+
+def splitDisciplines(df, disciplines):
+    # (disciplines available in the packed column, the remaining ones)
+    if disciplinesCol not in df.columns:
+        return [], list(disciplines)
+    packed = [d for d in disciplines if d in disciplineBits]
+    return packed, [d for d in disciplines if d not in disciplineBits]
+
+
+def getBits(df):
+    return df[disciplinesCol].to_numpy(dtype=np.uint64)
+
+
+def disciplinesMask(df, disciplinesAnd=disciplinesAnd):
+    packed, other = splitDisciplines(df, disciplinesAnd)
+    mask = pd.Series(True, index=df.index)
+    if len(packed) > 0:
+        wanted = toBits(packed)
+        mask &= (getBits(df) & wanted) == wanted
+    for discipline in other:
+        mask &= disciplineMarked(df, discipline)
+    return mask
+
+
+def disciplinesOrMask(df, disciplinesOr):
+    packed, other = splitDisciplines(df, disciplinesOr)
+    mask = pd.Series(len(disciplinesOr) == 0, index=df.index)
+    if len(packed) > 0:
+        mask |= (getBits(df) & toBits(packed)) != 0
+    for discipline in other:
+        mask |= disciplineMarked(df, discipline)
+    return mask
+
+
+def disciplinesNoneMask(df, disciplinesNone):
+    if len(disciplinesNone) == 0:
+        return pd.Series(True, index=df.index)
+    return ~disciplinesOrMask(df, disciplinesNone)
+
+
+@functools.lru_cache(maxsize=None)
+def compileKeywords(keywordsOr):
+    # one regex (alternation) for the whole keyword set (a tuple, compiled
+    # once), longer keywords go first so that the reported match
+    # is the most specific one
+    keywords = sorted({keyword.lower() for keyword in keywordsOr},
+                      key=len, reverse=True)
+    if len(keywords) == 0:
+        return None
+    return re.compile("(" + "|".join(map(re.escape, keywords)) + ")")
+
+
+def lowerTitles(df):
+    return [df[col].astype("string").str.lower() for col in titleCols]
+
+
+def matchKeywords(titles, keywordsOr):
+    # titles - lowercased title columns (see lowerTitles),
+    # returns the first keyword found in a title (or NaN) for every row
+    pattern = compileKeywords(tuple(keywordsOr))
+    matches = pd.Series(np.nan, index=titles[0].index, dtype=object)
+    if pattern is None:
+        return matches
+    for col in titles:
+        found = col.str.extract(pattern, expand=False)
+        matches = matches.combine_first(found.astype(object))
+    return matches.where(matches.notna(), np.nan)
+
+
+def matchTitleCriteria(df, keywordsIncludeOr=keywordsIncludeOr,
+                       keywordsExcludeOr=keywordsExcludeOr):
+    # every title column is lowercased once and scanned once per keyword set,
+    # the matched keywords are kept for auditing the results
+    titles = lowerTitles(df)
+    result = pd.DataFrame(index=df.index)
+    result["keywordIncluded"] = matchKeywords(titles, keywordsIncludeOr)
+    result["keywordExcluded"] = matchKeywords(titles, keywordsExcludeOr)
+    result["included"] = result["keywordIncluded"].notna()
+    result["excluded"] = result["keywordExcluded"].notna()
+    return result
+
+
+def keywordsMask(df, keywordsOr=keywordsIncludeOr):
+    return matchKeywords(lowerTitles(df), keywordsOr).notna()
+
+
+def titleCriteriaMask(df, keywordsIncludeOr=keywordsIncludeOr,
+                      keywordsExcludeOr=keywordsExcludeOr):
+    matches = matchTitleCriteria(df, keywordsIncludeOr, keywordsExcludeOr)
+    return matches["included"] & ~matches["excluded"]
+
+
+# row by row versions of the filters above (for use with df.apply(axis=1)),
+# they test the values of the row directly (the same results as the masks)
+def isMarked(value):
+    return isinstance(value, str) and value.strip() == "x"
+
+
+def hasDiscipline(row, discipline):
+    if disciplinesCol in row.index and discipline in disciplineBits:
+        bits = np.uint64(row[disciplinesCol])
+        return bool((bits >> disciplineBits[discipline]) & np.uint64(1))
+    return isMarked(row[discipline])
+
+
+def rowTitles(row):
+    return [row[col].lower() for col in titleCols
+            if isinstance(row[col], str)]
+
+
+def hasKeyword(titles, keywordsOr):
+    pattern = compileKeywords(tuple(keywordsOr))
+    if pattern is None:
+        return False
+    return any(pattern.search(title) is not None for title in titles)
 
 
 def isDiscipline(row, disciplinesAnd=disciplinesAnd):
-    bothOK = True
-    for discipline in disciplinesAnd:
-        if type(row[discipline]) == str:
-            bothOK = bothOK and row[discipline].strip() == "x"
-    return bothOK
+    return all(hasDiscipline(row, d) for d in disciplinesAnd)
 
 
 def isOneOfTheKeywords(row, keywordsOr=keywordsIncludeOr):
-    for keyword in keywordsOr:
-        if keyword in str(row["Tytuł 1"]).lower():
-            return True
-    for keyword in keywordsOr:
-        if keyword in str(row["Tytuł 2"]).lower():
-            return True
-    return False
+    return hasKeyword(rowTitles(row), keywordsOr)
 
 
 def isOneOfExcludedKeywords(row, keywords=keywordsExcludeOr):
@@ -40,11 +225,13 @@ def isOneOfExcludedKeywords(row, keywords=keywordsExcludeOr):
 
 
 def areJounalTitleCriteriaFullfilled(row):
-    return isOneOfTheKeywords(row) and not isOneOfExcludedKeywords(row)
+    titles = rowTitles(row)
+    return (hasKeyword(titles, keywordsIncludeOr)
+            and not hasKeyword(titles, keywordsExcludeOr))
 
 
 def isMenPoints(row, pts):
-    return row["Punktacja"] in pts
+    return row[pointsCol] in pts
 
 
 def rmCharFromText(text, char):
@@ -58,34 +245,78 @@ def getIndOfIssn(colWithIssns, issn):
     return -99
 
 
-def getIFsForIssns(dfIfs, issns):
-    colWithIssns = list(dfIfs["Issn"])
-    ifs = []
-    for issn in issns:
-        ifs.append(dfIfs.iloc[
-            getIndOfIssn(colWithIssns, issn), ]['Cites / Doc. (2years)'])
-    return ifs
+def normIssns(issns):
+    # "1234-567x " -> "1234567X", missing values stay missing
+    return (
+        pd.Series(issns, dtype="string")
+        .str.replace("-", "", regex=False)
+        .str.strip()
+        .str.upper()
+    )
+
+
+def buildIssnIndex(dfIfs, colWithIssns="Issn"):
+    # normalized issn -> row position in dfIfs,
+    # every comma separated issn in a cell gets its own entry
+    issns = normIssns(dfIfs[colWithIssns].reset_index(drop=True))
+    issns = issns.str.split(",").explode().str.strip()
+    issns = issns[issns.notna() & (issns != "")]
+    issnIndex = pd.Series(issns.index.to_numpy(), index=issns.to_numpy())
+    return issnIndex[~issnIndex.index.duplicated(keep="first")]
+
+
+def getIFsByIssn(dfIfs, issnIndex, colWithIFs="Cites / Doc. (2years)"):
+    return pd.Series(
+        dfIfs[colWithIFs].to_numpy()[issnIndex.to_numpy()],
+        index=issnIndex.index,
+    )
+
+
+def getIFsForIssns(dfIfs, issns, issnIndex=None,
+                   colWithIFs="Cites / Doc. (2years)"):
+    if issnIndex is None:
+        issnIndex = buildIssnIndex(dfIfs)
+    ifsByIssn = getIFsByIssn(dfIfs, issnIndex, colWithIFs)
+    ifs = normIssns(list(issns)).map(ifsByIssn)
+    return list(ifs.astype(object).where(ifs.notna(), np.nan))
+
+
+def getIFsForJournals(df, dfIfs, issnIndex=None, issnCols=issnCols,
+                      colWithIFs="Cites / Doc. (2years)"):
+    # one lookup for all issn columns of df at once,
+    # the first column (in order of issnCols) with a hit wins, misses -> NaN
+    if issnIndex is None:
+        issnIndex = buildIssnIndex(dfIfs)
+    ifsByIssn = getIFsByIssn(dfIfs, issnIndex, colWithIFs)
+    return lookupIFs(df, ifsByIssn, issnCols)
+
+
+def lookupIFs(df, ifsByIssn, issnCols=issnCols):
+    # ifsByIssn - normalized issn -> IF (see getIFsByIssn)
+    cols = [col for col in issnCols if col in df.columns]
+    issns = df[cols].stack()
+    ifs = normIssns(issns).map(ifsByIssn).dropna()
+    ifs = ifs.groupby(level=0, sort=False).first()
+    return ifs.reindex(df.index)
 
 
 ###############################################################################
 #                                    query1                                   #
 #           MNISW: 140, discipline: nauki medyczne i farmaceutyczne           #
 ###############################################################################
-df_w_men_pts = df[list(df.apply(isMenPoints, axis=1, pts=[140, 100]))]
-rowsDisciplinesTrue = list(df_w_men_pts.apply(isDiscipline, axis=1))
-df_w_men_pts_and_disciplines = df_w_men_pts[rowsDisciplinesTrue]
-rowsKeywordsOK = list(
-    df_w_men_pts_and_disciplines.apply(areJounalTitleCriteriaFullfilled,
-                                       axis=1)
-)
-df_w_men_pts_and_disciplines_and_keywords = df_w_men_pts_and_disciplines[
-    rowsKeywordsOK]
-
-ifs = getIFsForIssns(
-    dfIfPoints, list(df_w_men_pts_and_disciplines_and_keywords["issn"]))
-
-df_w_men_pts_and_disciplines_and_keywords.insert(loc=1, column="IF", value=ifs)
-
-df_w_men_pts_and_disciplines_and_keywords.to_csv(
-    "./journals_candidates_query1.csv", index=False, header=True
-)
+if __name__ == "__main__":
+    from loadJournals import loadIfs, loadJournals
+
+    df = loadJournals("./listOfJournals.csv")
+    dfIfPoints = loadIfs("./if_list.csv")
+
+    rowsQuery1 = (
+        menPointsMask(df, pts=[140, 100])
+        & disciplinesMask(df)
+        & titleCriteriaMask(df)
+    )
+    dfQuery1 = df[rowsQuery1].copy()
+    dfQuery1.insert(loc=1, column="IF",
+                    value=getIFsForJournals(dfQuery1, dfIfPoints))
+
+    saveJournals(dfQuery1, "./journals_candidates_query1.csv", header=True)
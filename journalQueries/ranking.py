@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from loadJournals import cacheDir, getCachePath, getFileHash, rmOldCaches
+
+# ranks (see getRanks) of all the journals of the list for a given key,
+# key - a column of the list, "IF", or a weighted score, e.g.
+# "score:IF=0.7,Punktacja=0.3" (weighted sum of min-max scaled columns)
+scorePrefix = "score:"
+
+
+def getScoreKey(weights):
+    return scorePrefix + ",".join(
+        "{}={}".format(col, weights[col]) for col in sorted(weights))
+
+
+def getRankKeys(query):
+    # keys for sorting the results of a query (best first), ties are
+    # broken by the following keys, "weights" become the first key
+    keys = list(query.get("rankBy", []))
+    if query.get("weights"):
+        keys.insert(0, getScoreKey(query["weights"]))
+    return keys
+
+
+def getKeyValues(df, ifs, key):
+    if key == "IF":
+        return pd.to_numeric(ifs, errors="coerce").to_numpy(dtype=float)
+    if key.startswith(scorePrefix):
+        score = np.zeros(len(df))
+        for part in key[len(scorePrefix):].split(","):
+            col, weight = part.rsplit("=", 1)
+            values = getKeyValues(df, ifs, col)
+            lowest, highest = np.nanmin(values), np.nanmax(values)
+            scaled = (values - lowest) / ((highest - lowest) or 1)
+            score += float(weight) * np.nan_to_num(scaled)
+        return score
+    return pd.to_numeric(df[key], errors="coerce").to_numpy(dtype=float)
+
+
+def getRanks(df, ifs, key):
+    # dense ranks, the highest value gets 0, equal values - equal ranks,
+    # missing values go last
+    values = pd.Series(getKeyValues(df, ifs, key))
+    ranks = values.rank(method="dense", ascending=False, na_option="bottom")
+    return ranks.to_numpy(dtype=np.int32) - 1
+
+
+def getCachedRanks(rankCache, df, ifs, key):
+    if key not in rankCache:
+        rankCache[key] = getRanks(df, ifs, key)
+    return rankCache[key]
+
+
+def topK(keyRanks, mask, k):
+    """
+    positions (best first) of at most k rows of mask (True) with
+    the lowest keyRanks[0], ties broken by keyRanks[1], keyRanks[2], ...,
+    and then by the position on the list
+    """
+    candidates = np.flatnonzero(np.asarray(mask))
+    if len(keyRanks) == 0:
+        return candidates[:k]
+    if len(candidates) > k:
+        # argpartition like selection, only rows that can make it
+        # to top k (including ties at the k-th place) are sorted
+        first = keyRanks[0][candidates]
+        kth = np.partition(first, k - 1)[k - 1]
+        candidates = candidates[first <= kth]
+    order = np.lexsort([ranks[candidates] for ranks in keyRanks[::-1]])
+    return candidates[order[:k]]
+
+
+def mergeTopK(best, rows, keys, k):
+    """
+    running top k of a ranked query over a list read in pieces
+    (see batchQueries.streamQueries): best - top k of the previous pieces
+    (None at first), rows - matching rows of the next piece (with "IF"),
+    the same order as topK, but by values instead of ranks of the whole
+    list, so score keys (min-max scaled over the whole list) are not
+    supported
+    """
+    if best is not None:
+        rows = pd.concat([best, rows])
+    if len(keys) == 0:
+        return rows.iloc[:k]
+    # the highest values first, missing values last, lexsort is stable,
+    # so ties stay in the order of the list
+    order = np.lexsort([
+        np.nan_to_num(-getKeyValues(rows, rows["IF"], key), nan=np.inf)
+        for key in keys[::-1]])
+    return rows.iloc[order[:k]]
+
+
+def loadRankCache(journalsPath, ifsPath):
+    # ranks are stored next to the cached list of journals, they are
+    # valid only for the same list and the same scimago file
+    cachePath = getCachePath(journalsPath, "_ranks", ".npz")
+    if not os.path.exists(cachePath):
+        return {}
+    with np.load(cachePath) as cached:
+        if str(cached["ifsHash"]) != getFileHash(ifsPath):
+            return {}
+        return {key: cached[key] for key in cached.files if key != "ifsHash"}
+
+
+def saveRankCache(rankCache, journalsPath, ifsPath):
+    cachePath = getCachePath(journalsPath, "_ranks", ".npz")
+    os.makedirs(cacheDir, exist_ok=True)
+    np.savez(cachePath, ifsHash=getFileHash(ifsPath), **rankCache)
+    rmOldCaches(cachePath)
@@ -0,0 +1,122 @@
+import collections
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from queryForJournals import rowHashCol
+
+# results of queries memoized by (canonical query spec, data fingerprint),
+# "name" and "output" do not change the result, so they are not in the key
+resultsDir = "./.cache/results"
+ignoredKeys = ["name", "output"]
+setKeys = ["points", "disciplinesAnd", "disciplinesOr", "disciplinesNone"]
+keywordKeys = ["keywordsIncludeOr", "keywordsExcludeOr"]
+
+
+def getQuerySpec(query):
+    # the same criteria written in a different order (or letter case
+    # for keywords, see compileKeywords) give the same spec
+    spec = {key: value for key, value in query.items()
+            if key not in ignoredKeys}
+    for key in setKeys:
+        if key in spec:
+            spec[key] = sorted({str(value) for value in spec[key]})
+    for key in keywordKeys:
+        if key in spec:
+            spec[key] = sorted({keyword.lower() for keyword in spec[key]})
+    return json.dumps(spec, sort_keys=True, ensure_ascii=False)
+
+
+def getDataFingerprint(df, dfIfs, *extra):
+    """
+    hash of the data the results depend on: row hashes of the list
+    of journals and its "lp" column (not in the row hashes), content
+    of the scimago file and any extra arrays (e.g. IF history) or flags
+    (e.g. fuzzy title matching on/off)
+    """
+    fingerprint = hashlib.sha1()
+    fingerprint.update(df[rowHashCol].to_numpy().tobytes())
+    if "lp" in df.columns:
+        fingerprint.update(
+            pd.util.hash_pandas_object(df["lp"], index=False).to_numpy()
+            .tobytes())
+    fingerprint.update(
+        pd.util.hash_pandas_object(dfIfs, index=False).to_numpy().tobytes())
+    for part in extra:
+        if isinstance(part, np.ndarray):
+            fingerprint.update(np.ascontiguousarray(part).tobytes())
+        else:
+            fingerprint.update(repr(part).encode("utf-8"))
+    return fingerprint.hexdigest()
+
+
+def getResultKey(query, fingerprint):
+    spec = getQuerySpec(query) + fingerprint
+    return hashlib.sha1(spec.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    two tier cache of query results (pd.DataFrame):
+    in memory - the last maxItems results (LRU),
+    on disk (resultsDir, None - off) - pickled results, the least
+    recently used files are removed above maxBytes in total,
+    hits/misses are counted in self.stats
+    """
+
+    def __init__(self, maxItems=32, resultsDir=None, maxBytes=256 * 2**20):
+        self.maxItems = maxItems
+        self.resultsDir = resultsDir
+        self.maxBytes = maxBytes
+        self.memory = collections.OrderedDict()
+        self.stats = {"memoryHits": 0, "diskHits": 0, "misses": 0}
+
+    def getPath(self, key):
+        return os.path.join(self.resultsDir, key + ".pkl")
+
+    def get(self, key):
+        # a copy, so that the caller can modify the result
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            self.stats["memoryHits"] += 1
+            return self.memory[key].copy()
+        if self.resultsDir is not None and os.path.exists(self.getPath(key)):
+            os.utime(self.getPath(key))  # recently used
+            result = pd.read_pickle(self.getPath(key))
+            self.stats["diskHits"] += 1
+            self.remember(key, result)
+            return result.copy()
+        self.stats["misses"] += 1
+        return None
+
+    def remember(self, key, result):
+        self.memory[key] = result.copy()
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.maxItems:
+            self.memory.popitem(last=False)
+
+    def put(self, key, result):
+        self.remember(key, result)
+        if self.resultsDir is not None:
+            os.makedirs(self.resultsDir, exist_ok=True)
+            result.to_pickle(self.getPath(key))
+            self.evict()
+
+    def evict(self):
+        files = [os.path.join(self.resultsDir, fileName)
+                 for fileName in os.listdir(self.resultsDir)
+                 if fileName.endswith(".pkl")]
+        files.sort(key=os.path.getmtime, reverse=True)
+        total = 0
+        for path in files:
+            total += os.path.getsize(path)
+            if total > self.maxBytes:
+                os.remove(path)
+
+    def __str__(self):
+        return "result cache: {} memory hits, {} disk hits, {} misses".format(
+            self.stats["memoryHits"], self.stats["diskHits"],
+            self.stats["misses"])
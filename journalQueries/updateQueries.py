@@ -0,0 +1,165 @@
+import argparse
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from batchQueries import (
+    evaluateQueries,
+    queryMask,
+    readQueries,
+    runQueries,
+)
+from loadJournals import loadIfs, loadJournals
+from queryForJournals import (
+    buildIssnIndex,
+    getIFsForJournals,
+    lowerTitles,
+    rowHashCol,
+    saveJournals,
+    titleCols,
+    uidCol,
+)
+from ranking import getRankKeys
+
+# state of the last run: <statePath>.feather (uid, rowHash of every journal)
+# and <statePath>.json (hash of the IFs and queries evaluated in that run)
+statePath = "./.cache/lastRun"
+
+
+def getIfsHash(dfIfs):
+    return hashlib.sha1(
+        pd.util.hash_pandas_object(dfIfs, index=False).to_numpy().tobytes()
+    ).hexdigest()
+
+
+def readState(statePath=statePath):
+    if not (os.path.exists(statePath + ".feather")
+            and os.path.exists(statePath + ".json")):
+        return None, None, {}
+    hashes = pd.read_feather(statePath + ".feather")
+    with open(statePath + ".json", encoding="utf-8") as f:
+        state = json.load(f)
+    return (hashes.set_index(uidCol)[rowHashCol], state.get("ifsHash"),
+            state.get("queries", {}))
+
+
+def saveState(df, dfIfs, queries, statePath=statePath):
+    os.makedirs(os.path.dirname(statePath), exist_ok=True)
+    df[[uidCol, rowHashCol]].reset_index(drop=True).to_feather(
+        statePath + ".feather")
+    state = {
+        "ifsHash": getIfsHash(dfIfs),
+        "queries": {query["name"]: query for query in queries},
+    }
+    with open(statePath + ".json", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=4)
+
+
+def diffReleases(oldHashes, df):
+    """
+    compares row hashes of two releases of the list by uid,
+    returns (added, removed, changed) uids
+    """
+    newHashes = pd.Series(df[rowHashCol].to_numpy(), index=df[uidCol])
+    added = newHashes.index.difference(oldHashes.index)
+    removed = oldHashes.index.difference(newHashes.index)
+    common = newHashes.index.intersection(oldHashes.index)
+    isChanged = (newHashes[common].to_numpy()
+                 != oldHashes[common].to_numpy())
+    return added, removed, common[isChanged]
+
+
+def getChangelog(query, previous, result):
+    titles = pd.concat([previous, result])
+    titles = titles.drop_duplicates(uidCol).set_index(uidCol)[titleCols[0]]
+    oldUids, newUids = set(previous[uidCol]), set(result[uidCol])
+    entered, left = sorted(newUids - oldUids), sorted(oldUids - newUids)
+    return pd.DataFrame({
+        "query": query["name"],
+        uidCol: entered + left,
+        titleCols[0]: titles.reindex(entered + left).to_numpy(),
+        "change": ["entered"] * len(entered) + ["left"] * len(left),
+    })
+
+
+def updateQueries(queries, df, dfIfs, changelogPath="./changelog.csv",
+                  statePath=statePath):
+    """
+    updates result files of the queries for a new release of the list (df),
+    only the rows added or changed since the last run are evaluated,
+    queries without a previous result (or with a changed spec) and
+    ranked queries ("top"/"rankBy"/"weights") are evaluated in full
+    (all of them if the IFs changed), journals
+    entering/leaving the results are written to changelogPath
+    """
+    oldHashes, oldIfsHash, oldQueries = readState(statePath)
+    if oldHashes is None:
+        runQueries(queries, df, dfIfs)
+        saveState(df, dfIfs, queries, statePath)
+        return None
+    # IFs of the rows kept from the previous results would be stale
+    ifsChanged = oldIfsHash != getIfsHash(dfIfs)
+
+    added, removed, changed = diffReleases(oldHashes, df)
+    issnIndex = buildIssnIndex(dfIfs)
+    fresh = df[df[uidCol].isin(added.union(changed))]
+    freshTitles = lowerTitles(fresh)
+    cache = {}
+
+    previousResults = {}
+    for query in queries:
+        if os.path.exists(query["output"]):
+            previousResults[query["name"]] = pd.read_csv(query["output"])
+    # ranked queries (see ranking) depend on the whole list,
+    # so they are always evaluated in full
+    full = [query for query in queries
+            if query["name"] not in previousResults or ifsChanged
+            or oldQueries.get(query["name"]) != query
+            or len(getRankKeys(query)) > 0 or "top" in query]
+    fullResults = evaluateQueries(full, df, dfIfs) if len(full) > 0 else {}
+
+    changelogs = []
+    for query in queries:
+        previous = previousResults.get(query["name"])
+        if query["name"] in fullResults:
+            result = fullResults[query["name"]]
+        else:
+            rows = queryMask(fresh, query, cache, freshTitles)
+            # only uids are kept from the previous result, the rows
+            # themselves (e.g. "lp", not in the row hash) come from df
+            kept = previous[uidCol][
+                ~previous[uidCol].isin(removed.union(changed))]
+            selected = (df[uidCol].isin(kept)
+                        | df[uidCol].isin(fresh.loc[rows, uidCol]))
+            result = df[selected].copy()
+            result.insert(loc=1, column="IF", value=getIFsForJournals(
+                result, dfIfs, issnIndex=issnIndex))
+        if previous is None:
+            previous = result.iloc[:0]
+        changelogs.append(getChangelog(query, previous, result))
+        saveJournals(result, query["output"], header=True)
+
+    changelog = pd.concat(changelogs, ignore_index=True)
+    changelog.to_csv(changelogPath, index=False, header=True)
+    saveState(df, dfIfs, queries, statePath)
+    return changelog
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="updates results of journal queries for a new release "
+        "of the list of journals")
+    parser.add_argument("queries", help="json file with a list of queries")
+    parser.add_argument("--journals", default="./listOfJournals.csv")
+    parser.add_argument("--ifs", default="./if_list.csv")
+    parser.add_argument("--changelog", default="./changelog.csv")
+    args = parser.parse_args()
+
+    updateQueries(
+        readQueries(args.queries),
+        loadJournals(args.journals),
+        loadIfs(args.ifs),
+        args.changelog,
+    )